@@ -0,0 +1,182 @@
+import bisect
+import csv
+import io
+import threading
+
+from listing import AMENITIES, COLUMNS
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile with the P-square algorithm (Jain and
+    Chlamtac, 1985): five markers are nudged towards their ideal positions as values
+    arrive, so the estimate costs constant memory and time per value. The first
+    EXACT_COUNT values are kept sorted and answered exactly, since five markers
+    can't place a p90 among a handful of prices; the markers start from them.
+    """
+
+    EXACT_COUNT = 50
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.values = []  # Sorted, until the markers take over
+        self.heights = []
+        self.positions = []
+        self.desired = []
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def _start_markers(self):
+        """Place the five markers on the sorted values seen so far"""
+        values = self.values
+        last = len(values)
+        self.desired = [1 + (last - 1) * increment for increment in self.increments]
+        self.positions = []
+        for i, desired in enumerate(self.desired):
+            # Keep the positions strictly increasing and inside the values
+            lowest = self.positions[-1] + 1 if self.positions else 1
+            self.positions.append(min(max(round(desired), lowest), last - (4 - i)))
+        self.heights = [values[position - 1] for position in self.positions]
+        self.values = None
+
+    def add(self, value):
+        self.count += 1
+        if self.values is not None:
+            bisect.insort(self.values, value)
+            if len(self.values) > self.EXACT_COUNT:
+                self._start_markers()
+            return
+
+        q = self.heights
+        n = self.positions
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = bisect.bisect_right(q, value) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers if they drifted a whole position away
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    # The parabola overshot a neighbour, fall back to linear
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self):
+        """The current estimate, exact while at most EXACT_COUNT values have been seen"""
+        if not self.count:
+            return None
+        if self.values is not None:
+            return self.values[round(self.p * (self.count - 1))]
+        return self.heights[2]
+
+
+class RunAggregates:
+    """
+    Summary statistics of a run, updated as each listing is written: listing count,
+    nightly price min/median/p90/max, the star rating distribution in 0.1 steps and
+    how many listings have each amenity.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.priced = 0
+        self.price_min = None
+        self.price_max = None
+        self.price_median = P2Quantile(0.5)
+        self.price_p90 = P2Quantile(0.9)
+        self.ratings = {}
+        self.amenity_counts = [0] * len(AMENITIES)
+        self.historical = 0
+        self.guest_favorites = 0
+
+    def add(self, listing):
+        with self.lock:
+            self.count += 1
+            price = listing.price_per_night
+            if price is not None:
+                self.priced += 1
+                self.price_min = price if self.price_min is None else min(self.price_min, price)
+                self.price_max = price if self.price_max is None else max(self.price_max, price)
+                self.price_median.add(price)
+                self.price_p90.add(price)
+
+            bucket = f"{int(round(listing.stars * 10, 6)) / 10:.1f}" if listing.stars is not None else "unrated"
+            self.ratings[bucket] = self.ratings.get(bucket, 0) + 1
+
+            flags = listing.amenity_flags
+            for bit in range(len(AMENITIES)):
+                if flags >> bit & 1:
+                    self.amenity_counts[bit] += 1
+            self.historical += listing.is_historical
+            self.guest_favorites += listing.is_guest_favorite
+
+    def summary(self):
+        """A JSON-ready snapshot of the statistics so far"""
+        with self.lock:
+            def share(count):
+                return round(count / self.count, 3) if self.count else 0.0
+
+            median = self.price_median.value()
+            p90 = self.price_p90.value()
+            return {
+                "listings": self.count,
+                "price_per_night": {
+                    "listings": self.priced,
+                    "min": self.price_min,
+                    "median": round(median) if median is not None else None,
+                    "p90": round(p90) if p90 is not None else None,
+                    "max": self.price_max
+                },
+                "ratings": dict(sorted(self.ratings.items(), reverse=True)),
+                "amenities": {amenity: share(count) for amenity, count in zip(AMENITIES, self.amenity_counts)},
+                "historical": share(self.historical),
+                "guest_favorite": share(self.guest_favorites)
+            }
+
+
+class ExportBuffers:
+    """
+    In-memory copies of the run's CSV and JSON output, appended to alongside the
+    files, so a finished run can be downloaded without reading the files back.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.csv_buffer = io.StringIO()
+        self.csv_writer = csv.writer(self.csv_buffer)
+        self.csv_writer.writerow(COLUMNS)
+        self.json_buffer = io.StringIO()
+        self.json_buffer.write("[")
+        self.records = 0
+
+    def add(self, record_json, row):
+        """Append one listing, given as its serialized JSON record and its CSV row"""
+        with self.lock:
+            self.csv_writer.writerow(row)
+            self.json_buffer.write(f"{',' if self.records else ''}\n{record_json}")
+            self.records += 1
+
+    def csv_text(self):
+        with self.lock:
+            return self.csv_buffer.getvalue()
+
+    def json_text(self):
+        with self.lock:
+            return self.json_buffer.getvalue() + "\n]"
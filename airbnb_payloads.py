@@ -0,0 +1,321 @@
+"""
+Parsers for the JSON Airbnb's own pages are built from: StaysSearch (search results)
+and StaysPdpSections (listing detail pages). Payloads arrive either as API responses
+captured from the network or embedded in the page's data-deferred-state scripts.
+The field layout moves around between releases, so the parsers look fields up by
+key anywhere in the payload rather than by fixed paths. Nothing here touches the
+browser, so recorded payloads can be parsed directly:
+
+    python airbnb_payloads.py search.json [nights]
+    python airbnb_payloads.py listing.json
+"""
+import base64
+import binascii
+import html
+import json
+import re
+import sys
+from urllib.parse import unquote
+
+from listing import Listing, to_float, to_int, to_text
+
+SEARCH_OPERATION = "StaysSearch"
+PDP_OPERATION = "StaysPdpSections"
+
+API_URL = re.compile(r"/api/v3/(\w+)")
+
+RATING_PATTERNS = [
+    re.compile(r"(\d\.\d+)\s*\((\d[\d,]*)\)"),
+    re.compile(r"(\d(?:\.\d+)?) out of 5 average rating,\s*(\d[\d,]*) review")
+]
+
+OVERVIEW_PATTERNS = {
+    "guest_limit": re.compile(r"(\d+)\+?\s+guests?", re.IGNORECASE),
+    "bedrooms": re.compile(r"(\d+)\s+bedrooms?", re.IGNORECASE),
+    "beds": re.compile(r"(\d+)\s+beds?\b", re.IGNORECASE),
+    "bathrooms": re.compile(r"(\d+(?:\.\d+)?)\s+(?:shared\s+|private\s+)?(?:half-)?baths?", re.IGNORECASE)
+}
+
+
+def operation_name(url):
+    """The GraphQL operation an API URL calls, e.g. "StaysSearch", or None"""
+    match = API_URL.search(url or "")
+    return match.group(1) if match else None
+
+
+def iter_values(obj, key):
+    """Yield every value stored under `key`, at any depth"""
+    if isinstance(obj, dict):
+        for k, value in obj.items():
+            if k == key:
+                yield value
+            yield from iter_values(value, key)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from iter_values(value, key)
+
+
+def iter_strings(obj):
+    """Yield every string in a payload, at any depth"""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from iter_strings(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from iter_strings(value)
+
+
+def _get(obj, *path):
+    for key in path:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def _first(values):
+    return next((value for value in values if value not in (None, "", [], {})), None)
+
+
+def decode_room_id(value):
+    """Room ID from a plain ID or a base64 global ID like "DemandStayListing:123" """
+    if value is None:
+        return None
+    value = str(value)
+    if value.isdigit():
+        return value
+    return decode_global_id(value)
+
+
+def decode_global_id(value):
+    """Room ID from a base64 global ID like "DemandStayListing:123", or None for anything else"""
+    if not isinstance(value, str) or value.isdigit():
+        return None
+    try:
+        decoded = base64.b64decode(value + "=" * (-len(value) % 4)).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    match = re.fullmatch(r"\w*Listing:(\d+)", decoded)
+    return match.group(1) if match else None
+
+
+def is_pdp_for(url, room_id):
+    """Whether a StaysPdpSections request URL is for the given room"""
+    if not room_id:
+        return True
+    url = unquote(url or "")
+    encoded = base64.b64encode(f"StayListing:{room_id}".encode("utf-8")).decode("ascii").rstrip("=")
+    return room_id in url or encoded in url
+
+
+def parse_rating(text):
+    """
+    Return (stars, review count) from "4.92 (123)" or "4.92 out of 5 average rating,
+    123 reviews" text, as payloads and search-result cards show it, or (None, None)
+    """
+    for pattern in RATING_PATTERNS:
+        match = pattern.search(text or "")
+        if match:
+            return to_float(match.group(1)), to_int(match.group(2))
+    return None, None
+
+
+def parse_price_text(text, num_nights):
+    """
+    Return (total price, price per night) as ints from payload or search-result card
+    text such as "$200 night", "$89 per night" or "$1,234 total". Either is None if
+    it can't be told, e.g. without a number of nights.
+    """
+    # Discounted prices list the original price first, so take the last amount
+    total_matches = re.findall(r"\$([\d,]+)\s*(?:total|for \d+ nights?)", text)
+    night_matches = re.findall(r"\$([\d,]+)\s*(?:/\s*|per\s+)?night", text)
+    nights = to_int(num_nights)
+    if total_matches:
+        total = to_int(total_matches[-1])
+        return total, (total // nights if nights else None)
+    if night_matches:
+        per_night = to_int(night_matches[-1])
+        return (per_night * nights if nights else None), per_night
+    return None, None
+
+
+def _display_price_text(result):
+    """Flatten a result's structured display price into text like "$200 night $1,234 total" """
+    price = _first(iter_values(result, "structuredStayDisplayPrice")) or _first(iter_values(result, "structuredDisplayPrice"))
+    if not isinstance(price, dict):
+        return " ".join(iter_strings(_first(iter_values(result, "pricingQuote")) or {}))
+    parts = []
+    for line_name in ("primaryLine", "secondaryLine"):
+        line = price.get(line_name)
+        if not isinstance(line, dict):
+            continue
+        # A discounted price is what the guest pays; the original is only shown crossed out
+        amount = line.get("discountedPrice") or line.get("price")
+        qualifier = line.get("qualifier") or ""
+        if amount:
+            parts.append(f"{amount} {qualifier}".strip())
+    return " ".join(parts)
+
+
+def _badges(result):
+    texts = []
+    for key in ("badges", "formattedBadges"):
+        for badges in iter_values(result, key):
+            for badge in badges if isinstance(badges, list) else []:
+                text = badge.get("text") if isinstance(badge, dict) else None
+                if text:
+                    texts.append(text)
+    return texts
+
+
+def parse_search_result(result, num_nights):
+    """Build a Listing from one StaysSearch result, or None if it has no room ID"""
+    room_id = decode_room_id(_get(result, "listing", "id")) or decode_room_id(_get(result, "demandStayListing", "id"))
+    if room_id is None:
+        # Only global IDs name their type; a bare number elsewhere may be a picture's or a host's ID
+        room_id = _first(decode_global_id(value) for value in iter_values(result, "id"))
+    if room_id is None:
+        return None
+
+    name = _first([
+        _get(result, "listing", "name"),
+        _get(result, "demandStayListing", "description", "name", "localizedStringWithTranslationPreference"),
+        _get(result, "nameLocalized", "localizedStringWithTranslationPreference"),
+        result.get("subtitle")
+    ])
+    title = _first([_get(result, "listing", "title"), result.get("title")])
+
+    stars, review_count = parse_rating(_first(iter_values(result, "avgRatingLocalized")))
+    if stars is None:
+        stars, review_count = parse_rating(_first(iter_values(result, "avgRatingA11yLabel")))
+    total_price, price_per_night = parse_price_text(_display_price_text(result), num_nights)
+
+    badges = _badges(result)
+    is_guest_favorite = (
+        any(badge.lower() == "guest favorite" for badge in badges)
+        or any(value is True for value in iter_values(result, "isGuestFavorite"))
+    )
+    return Listing(
+        url=f"https://www.airbnb.com/rooms/{room_id}",
+        name=to_text(name),
+        room_id=room_id,
+        title=to_text(title),
+        stars=stars,
+        review_count=review_count if review_count is not None else (0 if stars is None else None),
+        price_per_night=price_per_night,
+        total_price=total_price,
+        number_of_nights=to_int(num_nights),
+        badge=badges[0] if badges else None,
+        is_guest_favorite=is_guest_favorite
+    )
+
+
+def parse_search_payload(payload, num_nights):
+    """All listings in a StaysSearch payload, in result order"""
+    listings = []
+    for results in iter_values(payload, "searchResults"):
+        for result in results if isinstance(results, list) else []:
+            if isinstance(result, dict):
+                listing = parse_search_result(result, num_nights)
+                if listing is not None:
+                    listings.append(listing)
+    return listings
+
+
+def _html_to_text(value):
+    text = re.sub(r"<br\s*/?>|</p>", "\n", value, flags=re.IGNORECASE)
+    return html.unescape(re.sub(r"<[^>]+>", "", text)).strip()
+
+
+def parse_pdp_payload(payload):
+    """
+    Detail-page fields from a StaysPdpSections payload. Returns a dict with name,
+    guest_limit, bedrooms, beds, bathrooms, stars, review_count, location_rating,
+    is_guest_favorite, description and amenities_text (any of them may be None), or
+    None if the payload doesn't look like a detail page.
+    """
+    overview = []
+    for items in list(iter_values(payload, "overviewItems")) + list(iter_values(payload, "detailItems")):
+        for item in items if isinstance(items, list) else []:
+            title = item.get("title") if isinstance(item, dict) else None
+            if title:
+                overview.append(title)
+    overview_text = " · ".join(overview)
+
+    amenities = []
+    for key in ("seeAllAmenitiesGroups", "previewAmenitiesGroups"):
+        for groups in iter_values(payload, key):
+            for group in groups if isinstance(groups, list) else []:
+                for amenity in group.get("amenities") or [] if isinstance(group, dict) else []:
+                    if isinstance(amenity, dict) and amenity.get("title") and amenity.get("available", True):
+                        amenities.append(amenity["title"])
+    amenities = list(dict.fromkeys(amenities))
+
+    if not overview and not amenities:
+        return None
+
+    name = None
+    for section_type, section in _sections(payload):
+        if section_type.startswith("TITLE") and isinstance(section.get("title"), str):
+            name = section["title"]
+            break
+    name = name or _first(iter_values(payload, "listingTitle"))
+
+    location_rating = None
+    for ratings in iter_values(payload, "ratings"):
+        for rating in ratings if isinstance(ratings, list) else []:
+            if not isinstance(rating, dict):
+                continue
+            if str(rating.get("label", "")).lower() == "location" or rating.get("categoryType") == "LOCATION":
+                location_rating = to_float(rating.get("localizedRating") or rating.get("value"))
+                break
+        if location_rating is not None:
+            break
+
+    description = "\n".join(
+        _html_to_text(text) for text in iter_values(payload, "htmlText") if isinstance(text, str)
+    )
+
+    fields = {}
+    for field, pattern in OVERVIEW_PATTERNS.items():
+        match = pattern.search(overview_text)
+        convert = to_float if field == "bathrooms" else to_int
+        fields[field] = convert(match.group(1)) if match else None
+    fields.update({
+        "name": to_text(name),
+        "stars": to_float(_first(iter_values(payload, "overallRating"))),
+        "review_count": to_int(_first(iter_values(payload, "overallCount")) or _first(iter_values(payload, "reviewCount"))),
+        "location_rating": location_rating,
+        "is_guest_favorite": (
+            any(value is True for value in iter_values(payload, "isGuestFavorite"))
+            or any("GUEST_FAVORITE" in section_type for section_type, _ in _sections(payload))
+        ),
+        "description": description or None,
+        "amenities_text": "\n".join(amenities) or None
+    })
+    return fields
+
+
+def _sections(payload):
+    """Yield (section component type, section) for every detail-page section"""
+    for sections in iter_values(payload, "sections"):
+        for entry in sections if isinstance(sections, list) else []:
+            if isinstance(entry, dict) and isinstance(entry.get("section"), dict):
+                yield str(entry.get("sectionComponentType") or entry.get("sectionId") or ""), entry["section"]
+
+
+def main():
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    listings = parse_search_payload(payload, sys.argv[2] if len(sys.argv) > 2 else 1)
+    if listings:
+        for listing in listings:
+            print(json.dumps(listing.to_record()))
+    else:
+        print(json.dumps(parse_pdp_payload(payload), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from webscraper import AirbnbScraper, SCRAPE_MODES
+from rate_control import AdaptiveRateController
+from dedupe import RoomIdDeduper
+from profiles import ProfileManager
+
+
+def load_manifest(path):
+    """
+    Read a batch manifest from JSON or YAML. Example:
+
+        workers: 2
+        filter_path: runs/seen_rooms.bloom   # optional, skip rooms seen by earlier batches
+        persistent_profile: true             # optional, run every browser on a warm profile
+        tabs: 3                              # optional, detail pages each browser loads at once
+        network_capture: true                # optional, read Airbnb's JSON responses instead of the DOM
+        jobs:
+          - name: austin
+            url: https://www.airbnb.com/s/Austin--TX/homes?...
+            pages: 5
+            mode: grid
+            priority: 10                     # higher runs first
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    jobs = []
+    for index, job in enumerate(manifest.get("jobs", [])):
+        if "url" not in job:
+            raise ValueError(f"Job {index} in {path} has no url")
+        mode = job.get("mode", "full")
+        if mode not in SCRAPE_MODES:
+            raise ValueError(f"Job {index} in {path} has unknown mode {mode!r}")
+        jobs.append({
+            "name": job.get("name") or f"job-{index + 1}",
+            "url": job["url"],
+            "pages": int(job.get("pages", 5)),
+            "mode": mode,
+            "priority": int(job.get("priority", 0))
+        })
+    manifest["jobs"] = jobs
+    return manifest
+
+
+class BatchRunner:
+    """
+    Runs a list of search jobs on a fixed pool of scrapers. Every worker keeps one
+    Chrome for all of its jobs, and all workers share a single rate controller and
+    room-ID deduper, so a listing that shows up in several searches is scraped once.
+    """
+
+    def __init__(self, workers=1, rate_controller=None, deduper=None, update_status=print, verbose=False, profiles=None,
+                 tabs=1, network_capture=False):
+        self.workers = max(1, workers)
+        self.tabs = tabs
+        self.network_capture = network_capture
+        self.verbose = verbose
+        self.profiles = profiles
+        self.rate_controller = rate_controller or AdaptiveRateController(max_concurrency=max(4, workers))
+        self.deduper = deduper or RoomIdDeduper()
+        self.update_status = update_status
+        self.status_lock = threading.Lock()
+
+    def _log(self, message):
+        with self.status_lock:
+            self.update_status(message)
+
+    def run(self, jobs, on_listing=None):
+        """Run the jobs highest priority first and return one result dict per job, in manifest order"""
+        pending = queue.PriorityQueue()
+        for order, job in enumerate(jobs):
+            pending.put((-job["priority"], order, job))
+        results = [None] * len(jobs)
+
+        def worker(worker_id):
+            if self.verbose:
+                scraper_status = lambda message: self._log(f"[worker {worker_id}] {message}")
+            else:
+                scraper_status = lambda message: None
+            scraper = AirbnbScraper(
+                update_status=scraper_status,
+                rate_controller=self.rate_controller,
+                deduper=self.deduper,
+                profiles=self.profiles,
+                tabs=self.tabs,
+                network_capture=self.network_capture
+            )
+            try:
+                while True:
+                    try:
+                        _, order, job = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    results[order] = self._run_job(scraper, job, worker_id, on_listing)
+            finally:
+                scraper.close()
+
+        threads = [threading.Thread(target=worker, args=(i + 1,), daemon=True) for i in range(min(self.workers, len(jobs)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.deduper.save()
+        return results
+
+    def _run_job(self, scraper, job, worker_id, on_listing):
+        self._log(f"[worker {worker_id}] Starting {job['name']} ({job['mode']}, {job['pages']} pages)")
+        duplicates_before = scraper.counters["duplicates_skipped"]
+        started_at = datetime.now()
+        start = time.monotonic()
+        listings = 0
+        error = None
+
+        try:
+            scraper.start_run()
+            for listing in scraper.iter_listings(job["url"], num_pages=job["pages"], mode=job["mode"]):
+                listings += 1
+                if on_listing:
+                    on_listing(job, listing)
+        except Exception as e:
+            error = str(e)
+        # iter_listings handles its own failures, so ask it how the run ended
+        error = error or scraper.last_error
+
+        seconds = time.monotonic() - start
+        result = {
+            **job,
+            "worker": worker_id,
+            "run_dir": scraper.run_dir,
+            "listings": listings,
+            "duplicates_skipped": scraper.counters["duplicates_skipped"] - duplicates_before,
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "seconds": round(seconds, 2),
+            "listings_per_minute": round(listings / seconds * 60, 1) if seconds else None,
+            "error": error
+        }
+        self._log(
+            f"[worker {worker_id}] Finished {job['name']}: {listings} listings, "
+            f"{result['duplicates_skipped']} duplicates skipped in {seconds:.1f}s"
+            + (f" (error: {error})" if error else "")
+        )
+        return result
+
+
+def write_summary(results, started_at, seconds, metrics, runs_dir="runs"):
+    """Write the batch summary next to the run directories and return its path"""
+    batch_dir = os.path.join(runs_dir, f"batch_{started_at.strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(batch_dir, exist_ok=True)
+    summary_file = os.path.join(batch_dir, "summary.json")
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "seconds": round(seconds, 2),
+            "jobs": len(results),
+            "listings": sum(r["listings"] for r in results),
+            "duplicates_skipped": sum(r["duplicates_skipped"] for r in results),
+            "failed_jobs": [r["name"] for r in results if r["error"]],
+            "metrics": metrics,
+            "results": results
+        }, f, indent=2)
+    return summary_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every search in a batch manifest")
+    parser.add_argument("manifest", help="JSON or YAML manifest of searches")
+    parser.add_argument("--workers", type=int, help="Number of browsers to share between jobs (overrides the manifest)")
+    parser.add_argument("--verbose", action="store_true", help="Show every scraper log line, not just job progress")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    runner = BatchRunner(
+        workers=args.workers or int(manifest.get("workers", 1)),
+        deduper=RoomIdDeduper(filter_path=manifest.get("filter_path")),
+        verbose=args.verbose,
+        profiles=ProfileManager() if manifest.get("persistent_profile") else None,
+        tabs=int(manifest.get("tabs", 1)),
+        network_capture=bool(manifest.get("network_capture", False))
+    )
+
+    started_at = datetime.now()
+    start = time.monotonic()
+    results = runner.run(manifest["jobs"])
+    summary_file = write_summary(results, started_at, time.monotonic() - start, runner.rate_controller.metrics())
+    print(f"\nBatch finished: {sum(r['listings'] for r in results)} listings from {len(results)} searches")
+    print(f"Summary written to {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Microbenchmarks for the parsing and analysis helpers that run on every listing,
+fed with the page texts and search-result HTML in benchmarks/fixtures. Reports
+operations per second and the peak memory one call allocates, and exits non-zero
+when a benchmark is slower or allocates more than baseline.json allows. Speed is
+compared as a ratio to a fixed reference workload timed right alongside each
+benchmark, so a busy or throttled machine doesn't read as a regression.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --filter amenities
+    python benchmarks/run_benchmarks.py --update-baseline
+
+The ratios still shift between machines and Python versions, so refresh the
+baseline where the comparison runs before relying on it.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from listing import Listing  # noqa: E402
+from webscraper import AirbnbScraper  # noqa: E402
+
+# Header date ranges as Airbnb shows them
+DATE_RANGES = ["Jun 14 – 19", "Apr 18 – 20", "Dec 28 – Jan 3", "May 2 – 9, 2025", "Any week"]
+
+# Number texts as they come out of the detail page overview and price spans
+NUMBER_TEXTS = ["8 guests", "3 bedrooms", "4 beds", "2.5 baths", "Location 4.8", "N/A"]
+PRICE_TEXTS = ["$1,234", "$1,234 total", "$89 per night", "N/A"]
+
+
+def reference_workload():
+    """Fixed mix of string, regex and dict work that speed is measured relative to"""
+    text = "Bright modern home, 3 bedrooms · 4 beds · 2.5 baths, $1,234 total " * 4
+    counts = {}
+    for word in text.lower().split():
+        counts[word] = counts.get(word, 0) + 1
+    return len(re.findall(r"\d+", text)), json.dumps(counts)
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class FixturePage:
+    """Serves a recorded page as `page_source`, for helpers that read it off the driver"""
+
+    def __init__(self, page_source):
+        self.page_source = page_source
+
+
+def full_listing():
+    """A full-mode listing with every field set, as update_output_files gets it"""
+    listing = Listing(
+        url="https://www.airbnb.com/rooms/12345678?adults=2&check_in=2025-06-14&check_out=2025-06-19",
+        name="Bright Modern Home with Pool", room_id="12345678", title="Home in Austin",
+        bedrooms=3, beds=4, bathrooms=2.5, guest_limit=8, stars=4.93, review_count=96,
+        price_per_night=312, total_price=1560, number_of_nights=5, location_rating=4.8,
+        badge="Guest favorite", is_guest_favorite=True, is_historical=False,
+        historical_evidence="No historical evidence found"
+    )
+    listing.set_amenities({"TV": True, "Pool": True, "Jacuzzi": True, "Large Yard": True, "Laundry": True})
+    return listing
+
+
+def build_benchmarks():
+    """Return (name, call) pairs, where call() performs one operation"""
+    scraper = AirbnbScraper(update_status=lambda message: None)
+    benchmarks = []
+
+    for size in ("short", "full"):
+        text = fixture(f"amenities_{size}.txt")
+        benchmarks.append((f"amenities_text_matching[{size}]",
+                           lambda text=text: scraper.check_amenities_with_text_matching(text)))
+
+    for name in ("listing_page", "listing_page_historical"):
+        text = fixture(f"{name}.txt")
+        benchmarks.append((f"historical_term_scan[{name}]", lambda text=text: scraper._scan_historical_text(text)))
+
+    benchmarks.append(("extract_number", lambda: [scraper._extract_number(text) for text in NUMBER_TEXTS]))
+    benchmarks.append(("clean_price", lambda: [scraper._clean_price(text) for text in PRICE_TEXTS]))
+    benchmarks.append(("nights_from_date_range",
+                       lambda: [scraper._nights_from_date_range(text) for text in DATE_RANGES]))
+
+    for size in ("small", "medium", "large"):
+        html = fixture("search_page.html" if size == "medium" else f"search_page_{size}.html")
+        page_scraper = AirbnbScraper(update_status=lambda message: None)
+        page_scraper._driver = FixturePage(html)
+
+        def parse_page(page_scraper=page_scraper):
+            page_scraper.results.clear()
+            page_scraper._parse_page()
+        benchmarks.append((f"parse_page[{size}]", parse_page))
+        benchmarks.append((f"parse_grid_cards[{size}]", lambda html=html: scraper._parse_grid_cards(html, "5")))
+
+    listing = full_listing()
+
+    def serialize():
+        # What update_output_files does for each listing before touching the files
+        record = listing.to_record()
+        json.dumps(record)
+        listing.to_row()
+    benchmarks.append(("serialize_listing", serialize))
+    return benchmarks
+
+
+def time_calls(call, number):
+    # Like timeit, keep the garbage collector from landing in some rounds but not others
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def calls_per_round(call, round_time):
+    """How many calls make a timing round of at least round_time seconds"""
+    number = 1
+    while time_calls(call, number) < round_time:
+        number *= 2
+    return number
+
+
+def measure_speed(call, min_time=0.5, repeat=15):
+    """
+    Best operations per second of `call` and of the reference workload, over
+    `repeat` rounds that alternate between the two so both see the same machine.
+    """
+    round_time = min_time / repeat / 2
+    number = calls_per_round(call, round_time)
+    reference_number = calls_per_round(reference_workload, round_time)
+    best = reference_best = None
+    for _ in range(repeat):
+        elapsed = time_calls(call, number)
+        reference_elapsed = time_calls(reference_workload, reference_number)
+        best = elapsed if best is None else min(best, elapsed)
+        reference_best = reference_elapsed if reference_best is None else min(reference_best, reference_elapsed)
+    return number / best, reference_number / reference_best
+
+
+def measure_peak_bytes(call):
+    """Peak memory allocated while one call runs, above what was allocated before it"""
+    call()  # Warm up caches (compiled regexes, imports) so they aren't counted
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before
+
+
+def compare(result, baseline, tolerance):
+    """Return the reasons a result regressed past its baseline entry"""
+    if baseline is None:
+        return []
+    problems = []
+    slowest = baseline["relative_speed"] * (1 - tolerance)
+    if result["relative_speed"] < slowest:
+        problems.append(
+            f"{result['relative_speed']:.4g}x the reference speed is below {slowest:.4g}x "
+            f"({baseline['relative_speed']:.4g}x in baseline)"
+        )
+    # Small absolute slack, so a few stray bytes don't fail tiny benchmarks
+    largest = baseline["peak_bytes"] * (1 + tolerance) + 1024
+    if result["peak_bytes"] > largest:
+        problems.append(f"peak {result['peak_bytes']} bytes is above {largest:.0f} ({baseline['peak_bytes']} in baseline)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper's parsing helpers against a stored baseline")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to spend timing each benchmark")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed slowdown and allocation growth, as a fraction of the baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+
+    results = {}
+    failed = False
+    print(f"{'benchmark':<46} {'ops/sec':>12} {'peak KiB':>10}  vs baseline")
+    for name, call in build_benchmarks():
+        if args.filter and args.filter not in name:
+            continue
+        ops_per_sec, reference = measure_speed(call, args.min_time)
+        result = {
+            "ops_per_sec": round(ops_per_sec, 1),
+            "relative_speed": round(ops_per_sec / reference, 5),
+            "peak_bytes": measure_peak_bytes(call)
+        }
+        results[name] = result
+
+        previous = baseline.get(name)
+        change = f"{result['relative_speed'] / previous['relative_speed'] - 1:+.0%}" if previous else "new"
+        print(f"{name:<46} {result['ops_per_sec']:>12,.0f} {result['peak_bytes'] / 1024:>10.1f}  {change}")
+        problems = compare(result, previous, args.tolerance)
+        for problem in problems:
+            print(f"  FAIL: {problem}")
+        failed = failed or bool(problems)
+
+    if args.update_baseline:
+        # Keep entries of benchmarks that were filtered out of this run
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "benchmarks": dict(sorted({**baseline, **results}.items()))
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
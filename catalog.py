@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from listing import COLUMNS as LISTING_COLUMNS, FLAG_COLUMNS, NUMBER_COLUMNS
+
+RUNS_DIR = "runs"
+DATASET_DIR = "dataset"
+COMPACTED_FILE = "_compacted.json"
+RUN_ID_PATTERN = re.compile(r"^\d{8}_\d{6}(_\d+)?$")
+
+# Runs without a delta file are only treated as finished once they've been idle this long
+UNFINISHED_GRACE_SECONDS = 3600
+
+# Dataset columns whose names don't follow from their CSV column
+DATASET_NAMES = {
+    "Price/Night in May": "price_per_night",
+    "AirBnB Location Rating": "location_rating",
+    "Guest Favorite Status": "guest_favorite"
+}
+
+
+def _column_kind(csv_column):
+    if csv_column in FLAG_COLUMNS:
+        return "bool"
+    if csv_column in NUMBER_COLUMNS:
+        return "float"
+    return "string"
+
+
+# CSV column -> (dataset column, type), for every output column but the room ID, which is the dataset's key
+COLUMNS = {
+    csv_column: (
+        DATASET_NAMES.get(csv_column) or re.sub(r"\W+", "_", csv_column.lower()).strip("_"),
+        _column_kind(csv_column)
+    )
+    for csv_column in LISTING_COLUMNS if csv_column != "Room ID"
+}
+
+SCHEMA = pa.schema(
+    [("run_id", pa.string()), ("room_id", pa.string())]
+    + [(name, {"string": pa.string(), "float": pa.float64(), "bool": pa.bool_()}[kind])
+       for name, kind in COLUMNS.values()]
+)
+
+
+def _is_finished(run_dir):
+    if os.path.exists(os.path.join(run_dir, "delta.json")):
+        return True
+    csv_file = os.path.join(run_dir, "listings.csv")
+    return time.time() - os.path.getmtime(csv_file) > UNFINISHED_GRACE_SECONDS
+
+
+def _run_search_key(run_dir):
+    try:
+        with open(os.path.join(run_dir, "run.json"), "r") as f:
+            return json.load(f)["search_key"]
+    except (OSError, ValueError, KeyError):
+        return "unknown"
+
+
+def _typed_frame(csv_file, run_id):
+    """Read a run's CSV and convert it to the dataset's typed columns"""
+    raw = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+    frame = pd.DataFrame({"run_id": run_id}, index=raw.index)
+    # Runs from before the Room ID column only have it in the link
+    frame["room_id"] = raw.get("Link", pd.Series("", index=raw.index)).str.extract(r"/rooms/(?:plus/)?(\d+)")[0]
+    if "Room ID" in raw:
+        frame["room_id"] = raw["Room ID"].mask(raw["Room ID"].eq("")).fillna(frame["room_id"])
+    for csv_column, (name, kind) in COLUMNS.items():
+        values = raw[csv_column] if csv_column in raw else pd.Series("", index=raw.index)
+        if kind == "float":
+            frame[name] = pd.to_numeric(values.str.replace(r"[^\d.]", "", regex=True), errors="coerce")
+        elif kind == "bool":
+            frame[name] = values.str.upper().eq("TRUE")
+        else:
+            frame[name] = values.replace({"N/A": None, "": None})
+    return frame
+
+
+def _partition_dir(dataset_dir, key, day):
+    return os.path.join(dataset_dir, f"search={key}", f"date={day}")
+
+
+def compact(runs_dir=RUNS_DIR, dataset_dir=DATASET_DIR, update_status=print):
+    """
+    Fold finished run directories into the partitioned Parquet dataset. Each run is
+    added at most once; every touched partition is rewritten as a single file sorted
+    by room ID, so its row-group statistics let room lookups skip most of the data.
+    """
+    os.makedirs(dataset_dir, exist_ok=True)
+    compacted_file = os.path.join(dataset_dir, COMPACTED_FILE)
+    try:
+        with open(compacted_file, "r") as f:
+            compacted = set(json.load(f))
+    except (OSError, ValueError):
+        compacted = set()
+
+    new_frames = {}
+    for run_id in sorted(os.listdir(runs_dir)) if os.path.isdir(runs_dir) else []:
+        run_dir = os.path.join(runs_dir, run_id)
+        csv_file = os.path.join(run_dir, "listings.csv")
+        if run_id in compacted or not RUN_ID_PATTERN.match(run_id) or not os.path.exists(csv_file):
+            continue
+        if not _is_finished(run_dir):
+            update_status(f"Skipping run {run_id}, it is still in progress")
+            continue
+
+        day = datetime.strptime(run_id[:15], "%Y%m%d_%H%M%S").date().isoformat()
+        partition = (_run_search_key(run_dir), day)
+        new_frames.setdefault(partition, []).append((run_id, _typed_frame(csv_file, run_id)))
+
+    for (key, day), runs in new_frames.items():
+        partition_dir = _partition_dir(dataset_dir, key, day)
+        os.makedirs(partition_dir, exist_ok=True)
+        existing = [os.path.join(partition_dir, name) for name in os.listdir(partition_dir) if name.endswith(".parquet")]
+        tables = [pq.read_table(path, schema=SCHEMA) for path in existing]
+        tables += [pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False) for _, frame in runs]
+        table = pa.concat_tables(tables).sort_by([("room_id", "ascending"), ("run_id", "ascending")])
+
+        tmp_path = os.path.join(partition_dir, "part.parquet.tmp")
+        pq.write_table(table, tmp_path, row_group_size=10_000)
+        for path in existing:
+            os.remove(path)
+        os.replace(tmp_path, os.path.join(partition_dir, "part.parquet"))
+
+        compacted.update(run_id for run_id, _ in runs)
+        update_status(f"Compacted {len(runs)} run(s) into search={key}/date={day} ({table.num_rows} rows)")
+
+    with open(compacted_file, "w") as f:
+        json.dump(sorted(compacted), f)
+    return sum(len(runs) for runs in new_frames.values())
+
+
+def _partitions(dataset_dir, search=None, start=None, end=None):
+    """Yield (search key, date, path) for every partition that survives pruning"""
+    if not os.path.isdir(dataset_dir):
+        return
+    for search_dir in sorted(os.listdir(dataset_dir)):
+        if not search_dir.startswith("search="):
+            continue
+        key = search_dir[len("search="):]
+        if search and key != search:
+            continue
+        for date_dir in sorted(os.listdir(os.path.join(dataset_dir, search_dir))):
+            if not date_dir.startswith("date="):
+                continue
+            day = date.fromisoformat(date_dir[len("date="):])
+            if (start and day < start) or (end and day > end):
+                continue
+            yield key, day, os.path.join(dataset_dir, search_dir, date_dir)
+
+
+def query(columns=None, search=None, start=None, end=None, room_id=None, dataset_dir=DATASET_DIR):
+    """
+    Read listings from the dataset, touching only the partitions in the search and
+    date range and only the requested columns.
+    Args:
+        columns (list): Dataset columns to return, all of them if None
+        search (str): Search key (see delta.search_key) to restrict to
+        start, end (date): Inclusive scrape-date range
+        room_id (str): Only return rows for this room
+    Returns:
+        pandas.DataFrame with the requested columns plus search_key and scrape_date
+    """
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(list(columns) + (["room_id"] if room_id else [])))
+    filters = [("room_id", "=", str(room_id))] if room_id else None
+
+    tables = []
+    for key, day, path in _partitions(dataset_dir, search, start, end):
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".parquet"):
+                continue
+            table = pq.read_table(os.path.join(path, name), columns=read_columns, filters=filters)
+            if table.num_rows:
+                table = table.append_column("search_key", pa.array([key] * table.num_rows, pa.string()))
+                table = table.append_column("scrape_date", pa.array([day] * table.num_rows, pa.date32()))
+                tables.append(table)
+
+    if not tables:
+        names = (columns or [field.name for field in SCHEMA]) + ["search_key", "scrape_date"]
+        return pd.DataFrame(columns=names)
+    frame = pa.concat_tables(tables).to_pandas()
+    if columns is not None:
+        frame = frame[list(columns) + ["search_key", "scrape_date"]]
+    return frame
+
+
+def price_history(room_id, days=90, dataset_dir=DATASET_DIR):
+    """Nightly price of one room for every scrape in the last `days` days"""
+    start = date.today() - timedelta(days=days)
+    frame = query(["run_id", "price_per_night", "stars"], start=start, room_id=room_id, dataset_dir=dataset_dir)
+    return frame.sort_values("run_id").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact scraper runs into a dataset and query it")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="Dataset directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact_parser = commands.add_parser("compact", help="Fold finished runs into the dataset")
+    compact_parser.add_argument("--runs", default=RUNS_DIR, help="Directory holding the run directories")
+
+    query_parser = commands.add_parser("query", help="Query the dataset")
+    query_parser.add_argument("--columns", help="Comma-separated dataset columns")
+    query_parser.add_argument("--search", help="Search key to restrict to")
+    query_parser.add_argument("--start", type=date.fromisoformat, help="First scrape date (YYYY-MM-DD)")
+    query_parser.add_argument("--end", type=date.fromisoformat, help="Last scrape date (YYYY-MM-DD)")
+    query_parser.add_argument("--room-id", help="Only rows for this room")
+
+    history_parser = commands.add_parser("history", help="Price history of one room")
+    history_parser.add_argument("room_id")
+    history_parser.add_argument("--days", type=int, default=90)
+
+    args = parser.parse_args()
+    if args.command == "compact":
+        count = compact(args.runs, args.dataset)
+        print(f"Compacted {count} run(s) into {args.dataset}")
+    elif args.command == "query":
+        columns = args.columns.split(",") if args.columns else None
+        print(query(columns, args.search, args.start, args.end, args.room_id, args.dataset).to_string(index=False))
+    else:
+        print(price_history(args.room_id, args.days, args.dataset).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Modules that must only be loaded on the code paths that need them
+HEAVY_MODULES = ["selenium", "webdriver_manager", "bs4", "pandas", "dotenv", "pyarrow", "psutil"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module, repeat=5):
+    """
+    Import `module` in fresh interpreters under -X importtime.
+    Returns (best cumulative microseconds, set of every module that got imported).
+    """
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    imported = set()
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=repo_dir, capture_output=True, text=True, check=True
+        )
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            name = match.group(4)
+            imported.add(name)
+            if name == module and len(match.group(3)) == 1:
+                cumulative = int(match.group(2))
+                best = cumulative if best is None else min(best, cumulative)
+    return best, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing the scraper exceeds its import-time budget")
+    parser.add_argument("--module", default="webscraper")
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    best_us, imported = measure_import(args.module, args.repeat)
+    heavy = sorted(name for name in imported if name.split(".")[0] in HEAVY_MODULES)
+
+    print(f"import {args.module}: {best_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules loaded at import time: {', '.join(heavy)}")
+        failed = True
+    if best_us / 1000 > args.budget_ms:
+        print("FAIL: import time is over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Parse the StaysSearch and StaysPdpSections payloads in benchmarks/fixtures/payloads
+and fail if any field the scraper reads from them comes out different from what
+the page showed. Run it after changing airbnb_payloads.py, and add a payload here
+whenever Airbnb moves a field the parsers have to learn about.
+
+    python check_payloads.py
+"""
+import json
+import os
+import sys
+
+from airbnb_payloads import parse_pdp_payload, parse_search_payload
+
+PAYLOADS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures", "payloads")
+
+# Searched for 5 nights, as the page the payloads came with
+SEARCH_NIGHTS = 5
+
+# What each search result card showed, in result order
+SEARCH_EXPECTED = [
+    {
+        "room_id": "53412087", "name": "Bright Modern Home with Pool", "title": "Home in Austin",
+        "stars": 4.93, "review_count": 96, "price_per_night": 312, "total_price": 1560,
+        "badge": "Guest favorite", "is_guest_favorite": True
+    },
+    {
+        # Only a global ID, and a discounted price
+        "room_id": "718802554193226117", "name": "Bungalow near Zilker Park", "title": "Bungalow in Austin",
+        "stars": 4.81, "review_count": 1204, "price_per_night": 151, "total_price": 755,
+        "badge": None, "is_guest_favorite": False
+    },
+    {
+        # New listing without a rating, priced for the whole stay, with a bare picture ID that is not the room
+        "room_id": "40211983", "name": "Quiet Studio, Private Entrance", "title": "Guest suite in Austin",
+        "stars": None, "review_count": 0, "price_per_night": 218, "total_price": 1090,
+        "badge": None, "is_guest_favorite": False
+    }
+]
+
+PDP_EXPECTED = {
+    "name": "Bright Modern Home with Pool", "guest_limit": 8, "bedrooms": 3, "beds": 4, "bathrooms": 2.5,
+    "stars": 4.93, "review_count": 96, "location_rating": 4.8, "is_guest_favorite": True,
+    "description": "Built in 1928 and restored with care, this craftsman home sits on a quiet street.\n\n"
+                   "The space\nPool, hot tub & a big fenced yard.",
+    "amenities_text": "TV\nPrivate pool\nHot tub\nPrivate backyard – Fully fenced\nWasher\nDryer\nPool"
+}
+
+
+def load(name):
+    with open(os.path.join(PAYLOADS_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def differences(label, parsed, expected):
+    """Describe every expected field the parsed values get wrong"""
+    return [
+        f"{label} {field}: got {parsed.get(field)!r}, expected {value!r}"
+        for field, value in expected.items() if parsed.get(field) != value
+    ]
+
+
+def main():
+    problems = []
+
+    listings = parse_search_payload(load("stays_search.json"), SEARCH_NIGHTS)
+    if len(listings) != len(SEARCH_EXPECTED):
+        problems.append(f"stays_search.json: got {len(listings)} listings, expected {len(SEARCH_EXPECTED)}")
+    for index, (listing, expected) in enumerate(zip(listings, SEARCH_EXPECTED)):
+        parsed = {field: getattr(listing, field) for field in expected}
+        problems += differences(f"stays_search.json result {index}", parsed, expected)
+
+    details = parse_pdp_payload(load("stays_pdp_sections.json"))
+    if details is None:
+        problems.append("stays_pdp_sections.json: not recognised as a detail page")
+    else:
+        problems += differences("stays_pdp_sections.json", details, PDP_EXPECTED)
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    print(f"{len(listings)} search results and 1 detail page checked, {len(problems)} problems")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import time
+
+
+class Deadline:
+    """
+    Time budget for one piece of work, such as scraping a single listing. Every wait
+    made on its behalf asks for `timeout(limit)`, so the waits together can never
+    run past the budget, however many of them come up empty.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.end = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.end - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, limit):
+        """The wait to use for a step that would normally wait up to `limit` seconds"""
+        return min(limit, self.remaining())
+
+    def extend(self, seconds):
+        """Give back time that was spent waiting on something outside the work, like rate limiting"""
+        self.end += seconds
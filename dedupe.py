@@ -0,0 +1,104 @@
+import hashlib
+import math
+import os
+import struct
+import threading
+
+
+class RoomIdFilter:
+    """
+    Compact on-disk Bloom filter of room IDs, used to skip listings that were
+    already scraped by an earlier run in a multi-run batch. Lookups can return
+    false positives at roughly `error_rate`, never false negatives.
+    """
+
+    HEADER = struct.Struct("<QII")  # bit count, hash count, items added
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, room_id):
+        digest = hashlib.blake2b(str(room_id).encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        # Double hashing: k positions from two independent 64-bit hashes
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def __contains__(self, room_id):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(room_id))
+
+    def add(self, room_id):
+        for p in self._positions(room_id):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.num_bits, self.num_hashes, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            num_bits, num_hashes, count = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            bits = bytearray(f.read())
+        bloom = cls.__new__(cls)
+        bloom.num_bits, bloom.num_hashes, bloom.count, bloom.bits = num_bits, num_hashes, count, bits
+        return bloom
+
+
+class RoomIdDeduper:
+    """
+    Thread-safe record of the room IDs seen during a run, optionally backed by a
+    RoomIdFilter file so that repeated runs in a batch skip each other's listings.
+    """
+
+    def __init__(self, filter_path=None, capacity=1_000_000, error_rate=0.01):
+        self.seen = set()
+        self.filter_path = filter_path
+        self.filter = None
+        if filter_path:
+            if os.path.exists(filter_path):
+                self.filter = RoomIdFilter.load(filter_path)
+            else:
+                self.filter = RoomIdFilter(capacity, error_rate)
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def check_and_add(self, room_id):
+        """
+        Return True the first time a room ID is seen, False for duplicates. This only
+        claims the room for the current run; commit() it once the listing is written,
+        so that a room whose scrape failed is tried again by later runs.
+        """
+        if not room_id or room_id == "N/A":
+            return True  # Can't tell, so let it through
+        with self.lock:
+            if room_id in self.seen or (self.filter is not None and room_id in self.filter):
+                self.duplicates += 1
+                return False
+            self.seen.add(room_id)
+            return True
+
+    def commit(self, room_id):
+        """Record a claimed room as scraped in the on-disk filter, if one is configured"""
+        if self.filter is None or not room_id or room_id == "N/A":
+            return
+        with self.lock:
+            if room_id not in self.filter:
+                self.filter.add(room_id)
+
+    def release(self, room_id):
+        """Give up the claim on a room whose scrape failed, so it can be tried again"""
+        with self.lock:
+            self.seen.discard(room_id)
+
+    def save(self):
+        """Persist the on-disk filter, if one is configured"""
+        if self.filter is not None:
+            with self.lock:
+                self.filter.save(self.filter_path)
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Query parameters that only move through the results, not change the search itself
+PAGINATION_PARAMS = {"page", "cursor", "items_offset", "pagination_search", "federated_search_session_id"}
+
+# Output fields that are not part of a listing's content
+IGNORED_FIELDS = {"Link", "Room ID", "Source"}
+
+FINGERPRINT_DIR = os.path.join("runs", "_fingerprints")
+
+
+def search_key(url):
+    """Stable identifier for a search, ignoring pagination and parameter order"""
+    parts = urlsplit(url)
+    params = sorted((k, v) for k, v in parse_qsl(parts.query) if k not in PAGINATION_PARAMS)
+    normalized = f"{parts.netloc}{parts.path}?{urlencode(params)}"
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint(record):
+    """Short hash of a record's content fields"""
+    content = {k: v for k, v in record.items() if k not in IGNORED_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+class DeltaTracker:
+    """
+    Compares the listings of a run against the fingerprints kept from the previous
+    run of the same search in the same mode, and writes out what is new, changed or gone.
+    """
+
+    def __init__(self, url, mode="full", state_dir=FINGERPRINT_DIR):
+        self.url = url
+        self.mode = mode
+        self.key = search_key(url)
+        # Grid mode leaves the detail-page fields empty, so each mode is compared
+        # only against earlier runs in the same mode
+        state_name = self.key if mode == "full" else f"{self.key}-{mode}"
+        self.state_file = os.path.join(state_dir, f"{state_name}.json")
+        self.previous = self._load_previous()
+        self.current = {}
+        self.new = []
+        self.changed = []
+        self.carried_over = 0
+
+    def _load_previous(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("listings", {})
+        except (OSError, ValueError):
+            return {}
+
+    def add(self, listing_key, record):
+        """Classify one record of the current run"""
+        if not listing_key or listing_key == "N/A":
+            listing_key = record.get("Link", "")
+        fields = {k: v for k, v in record.items() if k not in IGNORED_FIELDS}
+        digest = fingerprint(record)
+        self.current[listing_key] = {"hash": digest, "fields": fields}
+
+        previous = self.previous.get(listing_key)
+        if previous is None:
+            self.new.append({"key": listing_key, "record": record})
+        elif previous["hash"] != digest:
+            # Columns added since the previous run have nothing to compare against
+            diffs = {
+                field: {"old": previous["fields"][field], "new": value}
+                for field, value in fields.items()
+                if field in previous["fields"] and previous["fields"][field] != value
+            }
+            if diffs:
+                self.changed.append({"key": listing_key, "link": record.get("Link", ""), "changes": diffs})
+
+    def carry_over(self, listing_key):
+        """
+        Count a listing the run saw but didn't scrape (e.g. another search in the batch
+        already had it) as still there, keeping its previous fingerprint
+        """
+        previous = self.previous.get(listing_key)
+        if previous is not None and listing_key not in self.current:
+            self.current[listing_key] = previous
+            self.carried_over += 1
+
+    def finish(self, delta_file, run_id, complete=True):
+        """
+        Write the delta file and store the fingerprints for the next run. Listings are
+        only reported as disappeared when the run finished, since an aborted run
+        simply didn't get to them; in that case the old fingerprints are carried over.
+        """
+        if complete:
+            disappeared = [key for key in self.previous if key not in self.current]
+            listings = self.current
+        else:
+            disappeared = []
+            listings = {**self.previous, **self.current}
+
+        delta = {
+            "search_url": self.url,
+            "search_key": self.key,
+            "mode": self.mode,
+            "run": run_id,
+            "complete": complete,
+            "has_previous_run": bool(self.previous),
+            "summary": {
+                "new": len(self.new),
+                "changed": len(self.changed),
+                "disappeared": len(disappeared),
+                "unchanged": len(self.current) - len(self.new) - len(self.changed) - self.carried_over,
+                "carried_over": self.carried_over
+            },
+            "new": self.new,
+            "changed": self.changed,
+            "disappeared": disappeared
+        }
+        with open(delta_file, "w", encoding="utf-8") as f:
+            json.dump(delta, f, indent=2)
+
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"search_url": self.url, "run": run_id, "listings": listings}, f, separators=(",", ":"))
+        os.replace(tmp_file, self.state_file)
+        return delta["summary"]
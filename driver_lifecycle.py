@@ -0,0 +1,108 @@
+import os
+
+
+def process_tree_rss(pid):
+    """Total resident memory in bytes of a process and all of its descendants, or None if unknown"""
+    try:
+        import psutil
+    except ImportError:  # Fall back to reading /proc directly
+        psutil = None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    return _proc_tree_rss(pid)
+
+
+def _proc_tree_rss(pid):
+    """Linux-only process tree RSS read from /proc"""
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can contain spaces, so split after its closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        stack.extend(children.get(current, []))
+    return total
+
+
+class DriverLifecycle:
+    """
+    Decides when a long-running Chrome should be replaced with a fresh one, based on
+    the resident memory of the whole browser process tree and the number of listings
+    it has processed since it was started.
+    """
+
+    def __init__(self, max_rss_mb=1500, max_listings=150, check_every=5):
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.max_listings = max_listings
+        self.check_every = check_every
+        self.listings_since_start = 0
+        self.recycle_count = 0
+        self.bytes_reclaimed = 0
+
+    def browser_rss(self, driver):
+        """Resident memory of chromedriver plus every Chrome process it spawned"""
+        try:
+            pid = driver.service.process.pid
+        except AttributeError:
+            return None
+        return process_tree_rss(pid)
+
+    def note_listing(self):
+        self.listings_since_start += 1
+
+    def should_recycle(self, driver):
+        """Return the reason the driver should be recycled now, or None to keep it"""
+        if self.max_listings and self.listings_since_start >= self.max_listings:
+            return f"processed {self.listings_since_start} listings"
+        # Walking the process tree isn't free, so only sample memory every few listings
+        if self.max_rss_bytes and self.listings_since_start and self.listings_since_start % self.check_every == 0:
+            rss = self.browser_rss(driver)
+            if rss is not None and rss >= self.max_rss_bytes:
+                return f"browser memory at {rss / 1024 / 1024:.0f} MB"
+        return None
+
+    def recycled(self, rss_before, rss_after):
+        """Record a completed recycle and return the number of bytes it reclaimed"""
+        self.listings_since_start = 0
+        self.recycle_count += 1
+        reclaimed = (rss_before - rss_after) if rss_before is not None and rss_after is not None else 0
+        self.bytes_reclaimed += max(0, reclaimed)
+        return reclaimed
+
+    def metrics(self):
+        return {
+            "driver_recycles": self.recycle_count,
+            "memory_reclaimed_mb": round(self.bytes_reclaimed / 1024 / 1024, 1),
+            "listings_since_recycle": self.listings_since_start
+        }
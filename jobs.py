@@ -0,0 +1,172 @@
+import itertools
+import queue
+import threading
+import time
+
+from webscraper import AirbnbScraper, SCRAPE_MODES
+from rate_control import AdaptiveRateController
+from dedupe import RoomIdDeduper
+
+FINISHED_STATES = ("done", "cancelled", "failed")
+
+
+class Job:
+    """
+    One scrape submitted to a JobManager. The worker running it reports everything
+    through `events`, a thread-safe queue of (kind, payload) tuples:
+    ("log", message), ("listing", Listing) and finally ("status", status).
+    """
+
+    def __init__(self, job_id, url, num_pages, mode):
+        self.id = job_id
+        self.url = url
+        self.num_pages = num_pages
+        self.mode = mode
+        self.status = "queued"
+        self.error = None
+        self.listings = 0
+        self.run_dir = None
+        self.json_file = None
+        self.csv_file = None
+        # Live statistics and in-memory CSV/JSON of the run, set once it starts
+        self.aggregates = None
+        self.exports = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    def drain(self):
+        """Return every event reported since the last call, without blocking"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class JobManager:
+    """
+    Runs scrapes on at most `max_jobs` background threads, so the caller (the
+    Streamlit app) never blocks on a scrape and a rerun doesn't kill it. Each worker
+    keeps its Chrome open between jobs and quits it after `idle_seconds` without
+    work; all workers share one rate controller, so the host stays polite no matter
+    how many users are scraping.
+    """
+
+    def __init__(self, max_jobs=2, max_queued=20, idle_seconds=300, keep_finished_seconds=3600,
+                 rate_controller=None, profiles=None):
+        self.max_jobs = max(1, max_jobs)
+        self.max_queued = max_queued
+        self.idle_seconds = idle_seconds
+        self.keep_finished_seconds = keep_finished_seconds
+        self.rate_controller = rate_controller or AdaptiveRateController(max_concurrency=max(4, self.max_jobs))
+        self.profiles = profiles
+        self.pending = queue.Queue()
+        self.jobs = {}
+        self.workers = 0
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def submit(self, url, num_pages=5, mode="full"):
+        """Queue a scrape and return its Job; raises RuntimeError if too many are waiting"""
+        if mode not in SCRAPE_MODES:
+            raise ValueError(f"Unknown scrape mode {mode!r}, expected one of {SCRAPE_MODES}")
+        with self.lock:
+            self._prune()
+            if self.pending.qsize() >= self.max_queued:
+                raise RuntimeError("Too many scrapes are waiting, try again in a few minutes")
+            job = Job(next(self._ids), url, num_pages, mode)
+            self.jobs[job.id] = job
+            self.pending.put(job)
+            if self.workers < self.max_jobs:
+                self.workers += 1
+                threading.Thread(target=self._worker, daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Stop a job; a running scrape ends after the listing it is on"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.done:
+                return
+            job.cancel_event.set()
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+
+    def queue_position(self, job):
+        """How many queued jobs were submitted before this one"""
+        return sum(1 for other in list(self.jobs.values())
+                   if other.status == "queued" and other.id < job.id)
+
+    def _prune(self):
+        # Forget finished jobs after a while, so abandoned sessions don't pile up
+        cutoff = time.time() - self.keep_finished_seconds
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    def _worker(self):
+        scraper = None
+        try:
+            while True:
+                try:
+                    job = self.pending.get(timeout=self.idle_seconds)
+                except queue.Empty:
+                    with self.lock:
+                        # A job may have been queued after the timeout, before we took the lock
+                        if self.pending.empty():
+                            self.workers -= 1
+                            return
+                    continue
+
+                with self.lock:
+                    # Cancelled while it was waiting
+                    if job.cancel_event.is_set():
+                        continue
+                    job.status = "running"
+                if scraper is None:
+                    scraper = AirbnbScraper(rate_controller=self.rate_controller, profiles=self.profiles,
+                                            keep_exports=True)
+                self._run(scraper, job)
+        finally:
+            if scraper is not None:
+                scraper.close()
+
+    def _run(self, scraper, job):
+        # The browser is reused between jobs, everything else belongs to this job
+        scraper.update_status = lambda message: job.events.put(("log", message))
+        scraper.deduper = RoomIdDeduper()
+        scraper.reset_counters()
+        scraper.stop_event = job.cancel_event
+
+        try:
+            scraper.start_run()
+            job.run_dir, job.json_file, job.csv_file = scraper.run_dir, scraper.json_file, scraper.csv_file
+            job.aggregates, job.exports = scraper.aggregates, scraper.exports
+            for listing in scraper.iter_listings(job.url, num_pages=job.num_pages, mode=job.mode):
+                job.listings += 1
+                job.events.put(("listing", listing))
+            if job.cancel_event.is_set():
+                self._finish(job, "cancelled")
+            elif scraper.last_error:
+                job.error = scraper.last_error
+                self._finish(job, "failed")
+            else:
+                self._finish(job, "done")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        job.events.put(("status", status))
@@ -0,0 +1,141 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Amenities detected on the detail page, in bit order of Listing.amenity_flags
+AMENITIES = (
+    "TV", "Pool", "Jacuzzi", "Billiards/Pool Table", "Large Yard",
+    "Balcony", "Laundry", "Home Gym"
+)
+
+# Output columns, in CSV order
+COLUMNS = [
+    "Link", "Room ID", "Name", "Title", "Bedrooms", "Beds", "Bathrooms", "Guest Limit",
+    "Stars", "Review Count", "Price/Night in May", "Total Price", "AirBnB Location Rating",
+    "Badge", "Source", "Amenities", "TV", "Pool", "Jacuzzi", "Historical House",
+    "Billiards Table", "Large Yard", "Balcony", "Laundry", "Home Gym",
+    "Guest Favorite Status", "Partial"
+]
+
+# Output columns that are booleans (shown as checkboxes, written as TRUE/FALSE)
+FLAG_COLUMNS = [
+    "TV", "Pool", "Jacuzzi", "Historical House", "Billiards Table", "Large Yard",
+    "Balcony", "Laundry", "Home Gym", "Guest Favorite Status", "Partial"
+]
+
+# Output columns that are numbers
+NUMBER_COLUMNS = [
+    "Bedrooms", "Beds", "Bathrooms", "Guest Limit", "Stars", "Review Count",
+    "Price/Night in May", "Total Price", "AirBnB Location Rating"
+]
+
+# Listing fields that end up in an output column and can be missing
+OUTPUT_FIELDS = (
+    "url", "name", "bedrooms", "beds", "bathrooms", "guest_limit",
+    "stars", "price_per_night", "location_rating"
+)
+
+_NUMBER = re.compile(r"\d*\.?\d+")
+
+
+def to_float(value):
+    """Parse a scraped number ("4.92", "$1,200", 3) into a float, or None if there isn't one"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value).replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def to_int(value):
+    """Parse a scraped number into an int, or None if there isn't one"""
+    number = to_float(value)
+    return int(number) if number is not None else None
+
+
+def to_text(value):
+    """Normalize scraped text, mapping the old "N/A" sentinel and blanks to None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in ("", "N/A") else value
+
+
+@dataclass(slots=True)
+class Listing:
+    """
+    One scraped listing. Numbers are stored typed, missing values are None, and the
+    amenity flags are packed into a single int, so a run holds one small object per
+    listing instead of several string dicts.
+    """
+    url: Optional[str] = None
+    name: Optional[str] = None
+    room_id: Optional[str] = None
+    title: Optional[str] = None
+    bedrooms: Optional[int] = None
+    beds: Optional[int] = None
+    bathrooms: Optional[float] = None
+    guest_limit: Optional[int] = None
+    stars: Optional[float] = None
+    review_count: Optional[int] = None
+    price_per_night: Optional[int] = None
+    total_price: Optional[int] = None
+    number_of_nights: Optional[int] = None
+    location_rating: Optional[float] = None
+    badge: Optional[str] = None
+    is_guest_favorite: bool = False
+    is_historical: bool = False
+    historical_evidence: Optional[str] = None
+    amenity_flags: int = 0
+    # Set when the listing's time budget ran out before every field was looked for
+    partial: bool = False
+
+    def set_amenities(self, analysis):
+        """Store the {amenity: bool} result of check_amenities_with_text_matching"""
+        self.amenity_flags = 0
+        for bit, amenity in enumerate(AMENITIES):
+            if analysis.get(amenity):
+                self.amenity_flags |= 1 << bit
+
+    def has_amenity(self, amenity):
+        return bool(self.amenity_flags >> AMENITIES.index(amenity) & 1)
+
+    @property
+    def amenities(self):
+        """Names of the amenities the listing has"""
+        return [amenity for bit, amenity in enumerate(AMENITIES) if self.amenity_flags >> bit & 1]
+
+    def missing_fields(self):
+        """Names of the output fields that could not be scraped"""
+        return [name for name in OUTPUT_FIELDS if getattr(self, name) is None]
+
+    def _values(self):
+        flags = self.amenity_flags
+        return (
+            self.url, self.room_id, self.name, self.title, self.bedrooms, self.beds, self.bathrooms,
+            self.guest_limit, self.stars, self.review_count, self.price_per_night, self.total_price,
+            self.location_rating, self.badge, "Airbnb",
+            "",  # Blank as requested
+            bool(flags & 1), bool(flags & 2), bool(flags & 4), self.is_historical,
+            bool(flags & 8), bool(flags & 16), bool(flags & 32), bool(flags & 64), bool(flags & 128),
+            self.is_guest_favorite, self.partial
+        )
+
+    def to_record(self):
+        """The listing keyed by output column with typed values, as written to the JSON file"""
+        return dict(zip(COLUMNS, self._values()))
+
+    def to_row(self):
+        """The listing as a CSV row: blanks for missing values and TRUE/FALSE for flags"""
+        row = []
+        for value in self._values():
+            if value is None:
+                row.append("")
+            elif isinstance(value, bool):
+                row.append("TRUE" if value else "FALSE")
+            elif isinstance(value, float):
+                row.append(f"{value:g}")
+            else:
+                row.append(value)
+        return row
@@ -0,0 +1,146 @@
+import base64
+import json
+import time
+
+from airbnb_payloads import operation_name
+
+# Chrome records DevTools network events in its performance log when asked to
+LOGGING_PREFS = {"performance": "ALL"}
+
+# Airbnb renders the first response of each operation into the page itself
+EMBEDDED_STATE_JS = """
+return Array.from(document.querySelectorAll("script[id^='data-deferred-state']"), s => s.textContent);
+"""
+
+DOCUMENT_COMPLETE_JS = "return document.readyState === 'complete';"
+
+POLL_SECONDS = 0.2
+
+
+class PayloadCapture:
+    """
+    Collects the JSON Airbnb's pages are rendered from: API responses picked out of
+    Chrome's performance log and fetched over the DevTools protocol, plus the state
+    the server embeds in the page. The driver must be started with
+    goog:loggingPrefs set to LOGGING_PREFS.
+    """
+
+    def __init__(self, driver, operations):
+        self.driver = driver
+        self.operations = set(operations)
+        self.requests = {}  # request ID -> (operation, url), until its body has arrived
+        self.payloads = []  # (operation, url, payload), oldest first
+
+    def reset(self):
+        """Forget everything captured so far, e.g. before loading the next page"""
+        try:
+            self.driver.get_log("performance")
+        except Exception:
+            pass
+        self.requests.clear()
+        self.payloads.clear()
+
+    def poll(self):
+        """Read new performance log entries and fetch the bodies of finished API responses"""
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                operation = operation_name(url)
+                if operation in self.operations:
+                    self.requests[params.get("requestId")] = (operation, url)
+            elif method == "Network.loadingFinished" and params.get("requestId") in self.requests:
+                operation, url = self.requests.pop(params["requestId"])
+                payload = self._response_body(params["requestId"])
+                if payload is not None:
+                    self.payloads.append((operation, url, payload))
+            elif method == "Network.loadingFailed":
+                self.requests.pop(params.get("requestId"), None)
+
+    def _response_body(self, request_id):
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            body = response.get("body", "")
+            if response.get("base64Encoded"):
+                body = base64.b64decode(body).decode("utf-8")
+            return json.loads(body)
+        except Exception:
+            # Bodies are dropped once the tab that loaded them navigates or closes
+            return None
+
+    def embedded(self):
+        """The JSON states embedded in the current page"""
+        payloads = []
+        try:
+            scripts = self.driver.execute_script(EMBEDDED_STATE_JS) or []
+        except Exception:
+            return payloads
+        for text in scripts:
+            try:
+                payloads.append(json.loads(text))
+            except (TypeError, ValueError):
+                continue
+        return payloads
+
+    def _find_captured(self, operation, parse, match, start=0):
+        """The newest non-empty parse of the captured responses from index `start` on"""
+        for captured_operation, url, payload in reversed(self.payloads[start:]):
+            if captured_operation == operation and (match is None or match(url)):
+                parsed = parse(payload)
+                if parsed:
+                    return parsed
+        return None
+
+    def _document_complete(self):
+        try:
+            return bool(self.driver.execute_script(DOCUMENT_COMPLETE_JS))
+        except Exception:
+            return False
+
+    def find(self, operation, parse, match=None):
+        """
+        The first parse(payload) result that isn't empty, trying captured responses of
+        `operation` (newest first, those whose URL passes `match`) and then the
+        embedded page state. Returns None if nothing parses.
+        """
+        self.poll()
+        parsed = self._find_captured(operation, parse, match)
+        if parsed:
+            return parsed
+        for payload in self.embedded():
+            parsed = parse(payload)
+            if parsed:
+                return parsed
+        return None
+
+    def wait_for(self, operation, parse, timeout, match=None, deadline=None):
+        """
+        Like find(), but first watch for the response until the document has finished
+        loading or `timeout` seconds (capped by the Deadline) pass. Only responses that
+        arrived since the last poll are parsed, and the embedded state, which comes
+        with the document, is parsed once at the end, so a payload that no longer
+        parses costs one page load rather than the whole timeout.
+        """
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+        end = time.monotonic() + timeout
+        checked = 0
+        while True:
+            self.poll()
+            parsed = self._find_captured(operation, parse, match, start=checked)
+            if parsed:
+                return parsed
+            checked = len(self.payloads)
+            if time.monotonic() >= end or self._document_complete():
+                break
+            time.sleep(POLL_SECONDS)
+        return self.find(operation, parse, match)
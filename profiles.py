@@ -0,0 +1,206 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialised
+    fcntl = None
+
+PROFILES_DIR = "profiles"
+TEMPLATE_NAME = "template"
+LOCK_FILE = ".in_use"
+TEMPLATE_LOCK_FILE = "template.lock"
+# New clones are copied under this prefix, which _clones() doesn't list, then renamed
+STAGING_PREFIX = ".staging-clone-"
+
+# A lock file with no PID yet is being written by its owner, unless it is this old
+UNWRITTEN_LOCK_SECONDS = 60
+
+# Chrome's own lock files and crash dumps must never be copied between profiles
+CLONE_IGNORE = shutil.ignore_patterns("Singleton*", "lockfile", "LOCK", "Crashpad", "*.tmp", LOCK_FILE)
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                continue
+    return total
+
+
+def _age(path):
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProfileManager:
+    """
+    Hands out persistent Chrome user-data directories so repeat runs start with a
+    warm HTTP cache, cookies (no consent popup) and DNS/TLS state. Each directory is
+    used by one browser at a time: idle clones are reused, new ones are copied from
+    a shared template profile, and old clones are evicted once the total size or
+    idle time goes over the limits.
+    """
+
+    def __init__(self, root=PROFILES_DIR, cache_size_mb=512, max_total_mb=4096,
+                 max_idle_days=14, template_refresh_hours=24):
+        self.root = root
+        self.cache_size_bytes = cache_size_mb * 1024 * 1024
+        self.max_total_bytes = max_total_mb * 1024 * 1024
+        self.max_idle_seconds = max_idle_days * 86400
+        self.template_refresh_seconds = template_refresh_hours * 3600
+        self.template_dir = os.path.join(root, TEMPLATE_NAME)
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def chrome_arguments(self, profile_dir):
+        """Chrome flags that point the browser at a profile and cap its disk cache"""
+        return [
+            f"--user-data-dir={os.path.abspath(profile_dir)}",
+            f"--disk-cache-dir={os.path.abspath(os.path.join(profile_dir, 'cache'))}",
+            f"--disk-cache-size={self.cache_size_bytes}"
+        ]
+
+    def _try_lock(self, profile_dir):
+        lock_path = os.path.join(profile_dir, LOCK_FILE)
+        for _ in range(2):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # Take over locks left behind by scrapers that died without releasing
+                try:
+                    with open(lock_path) as f:
+                        owner = int(f.read().strip() or 0)
+                except (OSError, ValueError):
+                    owner = 0
+                if owner and _pid_alive(owner):
+                    return False
+                if not owner and _age(lock_path) < UNWRITTEN_LOCK_SECONDS:
+                    return False
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    return False
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def _clones(self):
+        return [
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if name.startswith("clone-") and os.path.isdir(os.path.join(self.root, name))
+        ]
+
+    def acquire(self):
+        """Return a locked profile directory, reusing the most recently used idle clone"""
+        with self.lock:
+            for profile_dir in sorted(self._clones(), key=os.path.getmtime, reverse=True):
+                if self._try_lock(profile_dir):
+                    return profile_dir
+
+            # Copy and lock under a name other scrapers don't look at, then publish it
+            name = f"{os.getpid()}-{time.time_ns()}"
+            staging_dir = os.path.join(self.root, f"{STAGING_PREFIX}{name}")
+            with self._template_lock():
+                if os.path.isdir(self.template_dir):
+                    shutil.copytree(self.template_dir, staging_dir, ignore=CLONE_IGNORE)
+                else:
+                    os.makedirs(staging_dir)
+            if not self._try_lock(staging_dir):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise RuntimeError(f"Could not lock new Chrome profile {staging_dir}")
+            profile_dir = os.path.join(self.root, f"clone-{name}")
+            os.rename(staging_dir, profile_dir)
+            return profile_dir
+
+    def release(self, profile_dir):
+        """Unlock a profile once its browser has quit, refreshing the template from it if stale"""
+        with self.lock:
+            os.utime(profile_dir)
+            if self._template_is_stale():
+                self._refresh_template(profile_dir)
+            try:
+                os.remove(os.path.join(profile_dir, LOCK_FILE))
+            except OSError:
+                pass
+            self.evict()
+
+    def _template_is_stale(self):
+        if not os.path.isdir(self.template_dir):
+            return True
+        return time.time() - os.path.getmtime(self.template_dir) > self.template_refresh_seconds
+
+    @contextmanager
+    def _template_lock(self):
+        """Keep other processes from copying the template while it is swapped, and vice versa"""
+        with open(os.path.join(self.root, TEMPLATE_LOCK_FILE), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh_template(self, profile_dir):
+        # Build the new template beside the old one and swap, so clones never see a half copy
+        staging_dir = f"{self.template_dir}.staging-{os.getpid()}"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        shutil.copytree(profile_dir, staging_dir, ignore=CLONE_IGNORE)
+        with self._template_lock():
+            # Another process may have refreshed it while we were copying
+            if not self._template_is_stale():
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                return
+            old_dir = f"{self.template_dir}.old-{os.getpid()}"
+            if os.path.isdir(self.template_dir):
+                os.replace(self.template_dir, old_dir)
+            os.replace(staging_dir, self.template_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    def evict(self):
+        """Delete idle clones, least recently used first, until the limits are met"""
+        idle = []
+        for profile_dir in self._clones():
+            if os.path.exists(os.path.join(profile_dir, LOCK_FILE)):
+                continue
+            idle.append((os.path.getmtime(profile_dir), profile_dir))
+        idle.sort()
+
+        now = time.time()
+        total = _dir_size(self.root)
+        for mtime, profile_dir in idle:
+            if total <= self.max_total_bytes and now - mtime <= self.max_idle_seconds:
+                break
+            # Take the lock first, so a scraper can't pick the clone up while it is deleted
+            if not self._try_lock(profile_dir):
+                continue
+            size = _dir_size(profile_dir)
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            total -= size
+
+        # Half-copied clones left behind by scrapers that died while creating them
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(STAGING_PREFIX) and _age(path) > self.max_idle_seconds:
+                shutil.rmtree(path, ignore_errors=True)
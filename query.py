@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from listing import AMENITIES
+
+# Predicates a search-result card can decide, before the detail page is opened
+CARD_FIELDS = ("price_per_night", "stars", "review_count")
+
+# Predicates that need the detail page (grid mode reads the guest favorite badge too)
+DETAIL_FIELDS = ("guest_favorite", "historical", "amenities")
+
+ALL_FIELDS = CARD_FIELDS + DETAIL_FIELDS
+
+
+@dataclass
+class ListingQuery:
+    """
+    Filters and a result limit for a targeted scrape. Card predicates (price,
+    rating, review count) are checked before a listing is clicked, detail
+    predicates as soon as the detail page has given up their data, and the scrape
+    ends once `limit` matching listings have been written. A listing whose value
+    for a predicate is unknown does not match it.
+    """
+    min_price_per_night: Optional[int] = None
+    max_price_per_night: Optional[int] = None
+    min_stars: Optional[float] = None
+    min_reviews: Optional[int] = None
+    # Amenity names from listing.AMENITIES that must all be present
+    amenities: tuple = ()
+    historical: Optional[bool] = None
+    guest_favorite: Optional[bool] = None
+    limit: Optional[int] = None
+
+    def __post_init__(self):
+        unknown = [amenity for amenity in self.amenities if amenity not in AMENITIES]
+        if unknown:
+            raise ValueError(f"Unknown amenities {unknown}, expected some of {AMENITIES}")
+        self.amenities = tuple(self.amenities)
+        self.amenity_mask = sum(1 << AMENITIES.index(amenity) for amenity in self.amenities)
+
+    @property
+    def needs_detail(self):
+        """Whether some predicate can only be decided on the detail page"""
+        return bool(self.amenities) or self.historical is not None
+
+    def mismatch(self, listing, fields=ALL_FIELDS, known_only=False):
+        """
+        Describe the first of the given predicates the listing fails, or return None if
+        it passes them all. With known_only, values that are still missing pass, for
+        checking a listing before all of its data is in.
+        """
+        checks = {
+            "price_per_night": self._price_mismatch,
+            "stars": self._stars_mismatch,
+            "review_count": self._reviews_mismatch,
+            "guest_favorite": self._guest_favorite_mismatch,
+            "historical": self._historical_mismatch,
+            "amenities": self._amenities_mismatch
+        }
+        for field in fields:
+            reason = checks[field](listing, known_only)
+            if reason:
+                return reason
+        return None
+
+    def _price_mismatch(self, listing, known_only):
+        if self.min_price_per_night is None and self.max_price_per_night is None:
+            return None
+        price = listing.price_per_night
+        if price is None:
+            return None if known_only else "price per night unknown"
+        if self.min_price_per_night is not None and price < self.min_price_per_night:
+            return f"${price}/night is under ${self.min_price_per_night}"
+        if self.max_price_per_night is not None and price > self.max_price_per_night:
+            return f"${price}/night is over ${self.max_price_per_night}"
+        return None
+
+    def _stars_mismatch(self, listing, known_only):
+        if self.min_stars is None:
+            return None
+        if listing.stars is None:
+            return None if known_only else "rating unknown"
+        if listing.stars < self.min_stars:
+            return f"rated {listing.stars:g}, under {self.min_stars:g}"
+        return None
+
+    def _reviews_mismatch(self, listing, known_only):
+        if self.min_reviews is None:
+            return None
+        if listing.review_count is None:
+            return None if known_only else "review count unknown"
+        if listing.review_count < self.min_reviews:
+            return f"{listing.review_count} reviews, under {self.min_reviews}"
+        return None
+
+    def _guest_favorite_mismatch(self, listing, known_only):
+        if self.guest_favorite is None or listing.is_guest_favorite == self.guest_favorite:
+            return None
+        return "guest favorite" if listing.is_guest_favorite else "not a guest favorite"
+
+    def _historical_mismatch(self, listing, known_only):
+        if self.historical is None or listing.is_historical == self.historical:
+            return None
+        return "historical" if listing.is_historical else "not historical"
+
+    def _amenities_mismatch(self, listing, known_only):
+        if listing.amenity_flags & self.amenity_mask == self.amenity_mask:
+            return None
+        missing = [
+            amenity for amenity in self.amenities
+            if not listing.amenity_flags >> AMENITIES.index(amenity) & 1
+        ]
+        return f"no {', '.join(missing)}" if missing else None
+
+    def limit_reached(self, matches):
+        return self.limit is not None and matches >= self.limit
@@ -0,0 +1,171 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """Thread-safe token bucket that refills continuously at `rate` tokens per second"""
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def set_rate(self, rate):
+        """Change the refill rate, keeping the tokens earned at the old rate"""
+        with self.lock:
+            self._refill()
+            self.rate = rate
+
+    def acquire(self):
+        """Block until a token is available and take it, returning the time spent waiting"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveRateController:
+    """
+    Paces page loads with a token bucket and adapts both the request rate and the
+    number of concurrent loads AIMD-style: every healthy load adds a little, while
+    timeouts, challenge pages and slow loads cut multiplicatively (at most once per
+    cooldown so a burst of bad pages doesn't collapse the rate to the floor).
+    """
+
+    def __init__(self, initial_rate=0.5, min_rate=0.05, max_rate=4.0,
+                 initial_concurrency=1, max_concurrency=4, target_latency=8.0,
+                 increase_step=0.05, decrease_factor=0.5, cooldown=10.0,
+                 base_backoff=2.0, max_backoff=60.0):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.bucket = TokenBucket(initial_rate)
+        self.concurrency = initial_concurrency
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+        self.latency_ewma = None
+        self.consecutive_failures = 0
+        self.last_decrease = 0.0
+        self.successes_since_change = 0
+        self.counters = {"page_loads": 0, "timeouts": 0, "blocks": 0, "slow_loads": 0}
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def enter(self, block=True):
+        """
+        Take one of the adaptive concurrency slots and a rate token, for loads that
+        outlive a `with` block (e.g. a tab left loading). Without `block`, return False
+        at once if every slot is taken. Each successful enter() needs a leave().
+        """
+        with self.condition:
+            while self.in_flight >= self.concurrency:
+                if not block:
+                    return False
+                self.condition.wait()
+            self.in_flight += 1
+        try:
+            self.bucket.acquire()
+        except BaseException:
+            self.leave()
+            raise
+        return True
+
+    def leave(self):
+        """Give back a slot taken with enter()"""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the adaptive concurrency slots and a rate token for a page load"""
+        self.enter()
+        try:
+            yield
+        finally:
+            self.leave()
+
+    def record(self, latency=None, timed_out=False, blocked=False):
+        """Feed back the outcome of one page load"""
+        with self.condition:
+            self.counters["page_loads"] += 1
+            if latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+            if timed_out or blocked:
+                self.counters["timeouts" if timed_out else "blocks"] += 1
+                self.consecutive_failures += 1
+                self._decrease()
+            elif latency is not None and latency > self.target_latency:
+                self.counters["slow_loads"] += 1
+                self.consecutive_failures = 0
+                self._decrease()
+            else:
+                self.consecutive_failures = 0
+                self._increase()
+            self.condition.notify_all()
+
+    def _increase(self):
+        self.bucket.set_rate(min(self.max_rate, self.rate + self.increase_step))
+        self.successes_since_change += 1
+        # Only widen concurrency once the current width has proven itself
+        if self.successes_since_change >= 2 * self.concurrency and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self.successes_since_change = 0
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.successes_since_change = 0
+        self.bucket.set_rate(max(self.min_rate, self.rate * self.decrease_factor))
+        self.concurrency = max(1, int(self.concurrency * self.decrease_factor))
+
+    def backoff_delay(self):
+        """Full-jitter exponential backoff for the current failure streak"""
+        ceiling = min(self.max_backoff, self.base_backoff * (2 ** max(0, self.consecutive_failures - 1)))
+        return random.uniform(0, ceiling)
+
+    def backoff(self):
+        """Sleep for a jittered backoff and return how long we slept"""
+        delay = self.backoff_delay()
+        time.sleep(delay)
+        return delay
+
+    def metrics(self):
+        """Snapshot of the current pacing state"""
+        with self.condition:
+            return {
+                "rate_per_sec": round(self.rate, 3),
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                "consecutive_failures": self.consecutive_failures,
+                **self.counters
+            }
@@ -0,0 +1,149 @@
+import argparse
+import math
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from webscraper import AirbnbScraper, SCRAPE_MODES
+from dedupe import RoomIdDeduper
+from batch import BatchRunner, write_summary
+
+# Airbnb stops paginating a search after this many pages of this many cards
+MAX_PAGES_PER_SEARCH = 15
+RESULTS_PER_PAGE = 18
+RESULT_CAP = MAX_PAGES_PER_SEARCH * RESULTS_PER_PAGE
+
+BBOX_PARAMS = ("ne_lat", "ne_lng", "sw_lat", "sw_lng")
+
+# Dropped when a tile gets its own box: they pin the old map view or page position
+STALE_PARAMS = {
+    "page", "cursor", "items_offset", "pagination_search", "zoom", "zoom_level",
+    "place_id", "query", "search_by_map"
+}
+
+
+def bbox_from_url(url):
+    """Return the (ne_lat, ne_lng, sw_lat, sw_lng) map box of a search URL"""
+    params = dict(parse_qsl(urlsplit(url).query))
+    missing = [name for name in BBOX_PARAMS if name not in params]
+    if missing:
+        raise ValueError(f"Search URL has no map box (missing {', '.join(missing)}); move the map once and copy the URL again")
+    return tuple(float(params[name]) for name in BBOX_PARAMS)
+
+
+def with_bbox(url, bbox):
+    """The same search restricted to another map box"""
+    parts = urlsplit(url)
+    params = [(k, v) for k, v in parse_qsl(parts.query) if k not in BBOX_PARAMS and k not in STALE_PARAMS]
+    params += [(name, f"{value:.6f}") for name, value in zip(BBOX_PARAMS, bbox)]
+    params.append(("search_by_map", "true"))
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+def split_bbox(bbox):
+    """Split a box into four quadrants, north-east first"""
+    ne_lat, ne_lng, sw_lat, sw_lng = bbox
+    mid_lat = (ne_lat + sw_lat) / 2
+    mid_lng = (ne_lng + sw_lng) / 2
+    return [
+        (ne_lat, ne_lng, mid_lat, mid_lng),
+        (ne_lat, mid_lng, mid_lat, sw_lng),
+        (mid_lat, ne_lng, sw_lat, mid_lng),
+        (mid_lat, mid_lng, sw_lat, sw_lng)
+    ]
+
+
+class TilePlanner:
+    """
+    Splits a search's map box into tiles small enough that Airbnb lists every result
+    of each tile within its page cap. A box is probed for its result count and
+    split into quadrants until it reports fewer results than the cap, or until
+    max_depth is reached.
+    """
+
+    def __init__(self, scraper, cap=RESULT_CAP, max_depth=6, update_status=print):
+        self.scraper = scraper
+        self.cap = cap
+        self.max_depth = max_depth
+        self.update_status = update_status
+        self.probes = 0
+
+    def plan(self, url):
+        """Return a list of tiles, each a dict with url, bbox, depth and results"""
+        tiles = []
+        pending = [(bbox_from_url(url), 0)]
+        while pending:
+            bbox, depth = pending.pop()
+            tile_url = with_bbox(url, bbox)
+            results = self.scraper.get_result_count(tile_url)
+            self.probes += 1
+
+            if results == 0:
+                continue
+            if results is not None and results >= self.cap and depth < self.max_depth:
+                self.update_status(f"Tile at depth {depth} has {results}+ results, splitting")
+                pending.extend((quadrant, depth + 1) for quadrant in split_bbox(bbox))
+                continue
+            if results is not None and results >= self.cap:
+                self.update_status(f"Tile at depth {depth} still has {results}+ results, some may be missed")
+            tiles.append({"url": tile_url, "bbox": bbox, "depth": depth, "results": results})
+        return tiles
+
+
+def tile_jobs(tiles, mode="grid", name="tile"):
+    """Turn planned tiles into BatchRunner jobs, densest tiles first"""
+    jobs = []
+    for index, tile in enumerate(tiles):
+        results = tile["results"]
+        pages = MAX_PAGES_PER_SEARCH if results is None else max(1, math.ceil(results / RESULTS_PER_PAGE))
+        jobs.append({
+            "name": f"{name}-{index + 1}",
+            "url": tile["url"],
+            "pages": min(pages, MAX_PAGES_PER_SEARCH),
+            "mode": mode,
+            "priority": results or 0
+        })
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape a whole map area by splitting it into tiles under Airbnb's result cap")
+    parser.add_argument("url", help="Airbnb search URL with a map box (ne_lat, ne_lng, sw_lat, sw_lng)")
+    parser.add_argument("--workers", type=int, default=2, help="Number of browsers scraping tiles at once")
+    parser.add_argument("--mode", choices=SCRAPE_MODES, default="grid")
+    parser.add_argument("--cap", type=int, default=RESULT_CAP, help="Split tiles reporting at least this many results")
+    parser.add_argument("--max-depth", type=int, default=6, help="How many times a tile may be split")
+    parser.add_argument("--filter-path", help="Bloom filter file, to also skip rooms seen by earlier runs")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the planned tiles")
+    parser.add_argument("--verbose", action="store_true", help="Show every scraper log line, not just job progress")
+    args = parser.parse_args()
+
+    started_at = datetime.now()
+    start = time.monotonic()
+    runner = BatchRunner(workers=args.workers, deduper=RoomIdDeduper(filter_path=args.filter_path), verbose=args.verbose)
+
+    # Probe on the runner's rate controller, so planning and scraping share one pace
+    scraper = AirbnbScraper(update_status=print if args.verbose else lambda message: None,
+                            rate_controller=runner.rate_controller)
+    try:
+        planner = TilePlanner(scraper, cap=args.cap, max_depth=args.max_depth)
+        tiles = planner.plan(args.url)
+    finally:
+        scraper.close()
+
+    jobs = tile_jobs(tiles, mode=args.mode)
+    known = sum(tile["results"] or 0 for tile in tiles)
+    print(f"Planned {len(tiles)} tiles with about {known} results after {planner.probes} probes")
+    if args.dry_run:
+        for job in jobs:
+            print(f"{job['name']}: {job['priority']} results, {job['pages']} pages  {job['url']}")
+        return
+
+    results = runner.run(jobs)
+    summary_file = write_summary(results, started_at, time.monotonic() - start, runner.rate_controller.metrics())
+    print(f"\nTiled scrape finished: {sum(r['listings'] for r in results)} listings from {len(results)} tiles")
+    print(f"Summary written to {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,218 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-import pandas as pd
+# Selenium, webdriver_manager and BeautifulSoup are imported inside the methods
+# that use them, so importing this module (and building a scraper) stays cheap
 import time
 import json
 import os
 from datetime import datetime
 import re
 # from groq import Groq
-from dotenv import load_dotenv
 import csv
+import argparse
+from dataclasses import asdict
+import threading
+from collections import deque
+from rate_control import AdaptiveRateController
+from driver_lifecycle import DriverLifecycle
+from dedupe import RoomIdDeduper
+from delta import DeltaTracker, search_key
+from profiles import ProfileManager
+from listing import AMENITIES, COLUMNS, Listing, to_float, to_int, to_text
+from aggregates import ExportBuffers, RunAggregates
+from deadline import Deadline
+from query import ALL_FIELDS, CARD_FIELDS, ListingQuery
+from airbnb_payloads import (
+    PDP_OPERATION, SEARCH_OPERATION, is_pdp_for, parse_pdp_payload, parse_price_text, parse_rating, parse_search_payload
+)
+from network_capture import LOGGING_PREFS, PayloadCapture
+
+SCRAPE_MODES = ("full", "grid")
+
+# Badges Airbnb prints on search-result cards
+GRID_BADGES = ["Guest favorite", "Superhost", "Rare find"]
+
+# Text that shows up on challenge / block pages instead of listings
+BLOCK_MARKERS = [
+    "captcha", "access denied", "unusual traffic", "are you a human",
+    "verify you are a human", "request blocked", "too many requests"
+]
+
+# How many times a search page is retried after a timeout or block page
+PAGE_LOAD_RETRIES = 2
+
+# Default time budget in seconds for scraping one listing in full mode
+LISTING_BUDGET = 45
+
+# A detail tab that hasn't finished loading after this many seconds is read as it is
+DETAIL_LOAD_TIMEOUT = 15
+
+# How long the tab scheduler sleeps when none of its tabs has finished loading
+TAB_POLL_SECONDS = 0.2
+
+# True once a tab has navigated away from about:blank and finished loading
+MONTHS = {month: number for number, month in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+
+# "Dec 28 – Jan 3, 2025": start month and day, optional end month, end day, optional year
+DATE_RANGE_PATTERN = re.compile(r"([A-Za-z]{3,})\.?\s+(\d{1,2})\s*[–—-]\s*(?:([A-Za-z]{3,})\.?\s+)?(\d{1,2})(?:,\s*(\d{4}))?")
+
+TAB_READY_JS = "return document.readyState === 'complete' && location.href !== 'about:blank';"
+
+# Resolves from inside the page as soon as the selectors match, instead of polling
+# over the WebDriver protocol. Selectors starting with "/", "./" or "(" are XPath,
+# anything else is CSS. Arguments: selectors, timeout in ms, require all.
+WAIT_FOR_SELECTORS_JS = """
+var selectors = arguments[0], timeoutMs = arguments[1], requireAll = arguments[2];
+var done = arguments[arguments.length - 1];
+
+function find(selector) {
+    if (selector.charAt(0) === '/' || selector.charAt(0) === '(' || selector.indexOf('./') === 0) {
+        return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return document.querySelector(selector);
+}
+
+function check() {
+    var found = selectors.map(find);
+    if (requireAll) {
+        return found.every(Boolean) ? found : null;
+    }
+    for (var i = 0; i < found.length; i++) {
+        if (found[i]) return [i, found[i]];
+    }
+    return null;
+}
+
+var initial = check();
+if (initial) {
+    done(initial);
+    return;
+}
+
+var finished = false, observer = null, timer = null;
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(result);
+}
+observer = new MutationObserver(function() {
+    var result = check();
+    if (result) finish(result);
+});
+observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+timer = setTimeout(function() {
+    finish(requireAll ? selectors.map(find) : null);
+}, timeoutMs);
+"""
+
+# Resolves once the document has fully loaded, or with false on timeout
+WAIT_FOR_LOAD_JS = """
+var timeoutMs = arguments[0], done = arguments[arguments.length - 1];
+if (document.readyState === 'complete') {
+    done(true);
+    return;
+}
+var timer = setTimeout(function() { done(false); }, timeoutMs);
+window.addEventListener('load', function() { clearTimeout(timer); done(true); });
+"""
+
+# Heading above the results, e.g. "Over 1,000 homes in Austin" or "312 homes within map area"
+RESULT_COUNT_SELECTORS = [
+    "[data-testid='stays-page-heading']",
+    "//h1[contains(., 'home') or contains(., 'place') or contains(., 'stay')]"
+]
+
+GRID_ITEMS_XPATH = '//*[@id="site-content"]/div/div[2]/div/div/div/div/div/div'
 
 class AirbnbScraper:
-    def __init__(self, update_status=None):
+    def __init__(self, update_status=None, rate_controller=None, lifecycle=None, deduper=None, profiles=None,
+                 stop_event=None, keep_exports=False, listing_budget=LISTING_BUDGET, tabs=1, network_capture=False):
         self.update_status = update_status or print  # Use provided update function or fallback to print
-        self.setup_driver()
+        self.rate_controller = rate_controller or AdaptiveRateController()
+        self.lifecycle = lifecycle or DriverLifecycle()
+        # Pass a RoomIdDeduper with a filter_path to also skip rooms scraped by earlier runs
+        self.deduper = deduper or RoomIdDeduper()
+        self.reset_counters()
+        # Seconds a full-mode listing may take before it is written out with what we have
+        self.listing_budget = listing_budget
+        # Detail pages loaded at once in full mode, each in its own tab of the one browser
+        self.tabs = max(1, tabs)
+        # Read listings from the JSON Airbnb's pages are built from, falling back to the DOM
+        self.network_capture = network_capture
+        self.capture = None
+        # Setting this event (see stop()) ends iter_listings at the next listing or page
+        self.stop_event = stop_event or threading.Event()
+        # Pass a ProfileManager to run Chrome on a persistent, warm profile instead of a throwaway one
+        self.profiles = profiles
+        self.profile_dir = None
+        # Keep in-memory copies of the CSV and JSON output, for serving downloads
+        self.keep_exports = keep_exports
+        self._popups_dismissed = False
         self.results = []
         # self.setup_groq()
-        
-        # Create run-specific directory
-        self.run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.run_dir = os.path.join("runs", self.run_timestamp)
-        if not os.path.exists(self.run_dir):
-            os.makedirs(self.run_dir)
+
+        # Chrome and the run directory are only created once there is work to do
+        self._driver = None
+        self.run_timestamp = None
+        self.run_dir = None
+        self.json_file = None
+        self.csv_file = None
+        self.delta_file = None
+        self.delta = None
+        self.query = None
+        # Why the last iter_listings ended early, or None if it got through its pages
+        self.last_error = None
+        self.aggregates = None
+        self.exports = None
+
+    @property
+    def driver(self):
+        """The Chrome driver, launched on first use"""
+        if self._driver is None:
+            self.setup_driver()
+        return self._driver
+
+    def start_run(self):
+        """Create a new run directory with empty output files"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_timestamp = timestamp
+        # Several scrapers in one process can start a run in the same second
+        suffix = 1
+        while True:
+            self.run_dir = os.path.join("runs", self.run_timestamp)
+            try:
+                os.makedirs(self.run_dir)
+                break
+            except FileExistsError:
+                self.run_timestamp = f"{timestamp}_{suffix}"
+                suffix += 1
         
         # Initialize output files
         self.json_file = os.path.join(self.run_dir, "listings.json")
         self.csv_file = os.path.join(self.run_dir, "listings.csv")
+        self.delta_file = os.path.join(self.run_dir, "delta.json")
         
         # Create empty JSON file
         with open(self.json_file, 'w') as f:
-            json.dump([], f)
+            f.write("[\n]")
+        self.json_record_count = 0
+        self.aggregates = RunAggregates()
+        self.exports = ExportBuffers() if self.keep_exports else None
         
         # Create CSV with headers
-        headers = [
-            "Link", "Name", "Bedrooms", "Beds", "Bathrooms", "Guest Limit", 
-            "Stars", "Price/Night in May", "AirBnB Location Rating", "Source", 
-            "Amenities", "TV", "Pool", "Jacuzzi", "Historical House", 
-            "Billiards Table", "Large Yard", "Balcony", "Laundry", "Home Gym",
-            "Guest Favorite Status"
-        ]
         with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            writer.writerow(headers)
+            writer.writerow(COLUMNS)
         
     def setup_driver(self):
         """Set up the Chrome driver with appropriate options"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+
         chrome_options = Options()
         # chrome_options.add_argument("--headless")  # Run in headless mode
         chrome_options.add_argument("--headless=new")  # Run in headless mode
@@ -59,28 +220,597 @@ class AirbnbScraper:
         # chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         # chrome_options.add_argument("--start-maximized")
+        if self.network_capture:
+            chrome_options.set_capability("goog:loggingPrefs", LOGGING_PREFS)
+
+        if self.profiles is not None:
+            self.profile_dir = self.profiles.acquire()
+            for argument in self.profiles.chrome_arguments(self.profile_dir):
+                chrome_options.add_argument(argument)
+            # A profile that already dismissed the cookie popup keeps the consent cookie
+            self._popups_dismissed = os.path.exists(os.path.join(self.profile_dir, "popups_dismissed"))
+            self.update_status(f"Using persistent Chrome profile {self.profile_dir}")
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        # self.driver = webdriver.Chrome(options=chrome_options)
+        try:
+            service = Service(ChromeDriverManager().install())
+            self._driver = webdriver.Chrome(service=service, options=chrome_options)
+        except Exception:
+            # close() only releases the profile of a driver that started
+            if self.profile_dir is not None:
+                self.profiles.release(self.profile_dir)
+                self.profile_dir = None
+            raise
+        self._driver.set_page_load_timeout(30)
+        # In-page waits enforce their own timeouts, this is only a safety net
+        self._driver.set_script_timeout(120)
+        if self.network_capture:
+            self.capture = PayloadCapture(self._driver, (SEARCH_OPERATION, PDP_OPERATION))
+        # self._driver = webdriver.Chrome(options=chrome_options)
         
     # def setup_groq(self):
     #     """Set up the Groq client"""
     #     load_dotenv()
     #     self.groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
         
+    def wait_for_any(self, selectors, timeout, deadline=None):
+        """
+        Wait inside the page until any of the selectors (XPath or CSS) matches, in a
+        single round trip. Returns (index of the matching selector, element), or
+        (None, None) if nothing matched within `timeout` seconds. With a Deadline the
+        wait is also cut to the time it has left.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+
+        try:
+            result = self.driver.execute_async_script(
+                WAIT_FOR_SELECTORS_JS, list(selectors), int(timeout * 1000), False
+            )
+        except WebDriverException:
+            # Navigation or a closed window interrupted the wait
+            return None, None
+        if not result:
+            return None, None
+        return result[0], result[1]
+
+    def wait_for(self, selector, timeout, deadline=None):
+        """Wait inside the page for a single selector, returning the element or None"""
+        return self.wait_for_any([selector], timeout, deadline)[1]
+
+    def wait_for_all(self, selectors, timeout, deadline=None):
+        """
+        Wait inside the page until every selector matches or the timeout passes.
+        Returns one element per selector, with None for those that never appeared.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+
+        try:
+            result = self.driver.execute_async_script(
+                WAIT_FOR_SELECTORS_JS, list(selectors), int(timeout * 1000), True
+            )
+        except WebDriverException:
+            return [None] * len(selectors)
+        return result or [None] * len(selectors)
+
+    def wait_for_page_load(self, timeout, deadline=None):
+        """Wait for the current document's load event, returning False on timeout"""
+        from selenium.common.exceptions import WebDriverException
+
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+
+        try:
+            return bool(self.driver.execute_async_script(WAIT_FOR_LOAD_JS, int(timeout * 1000)))
+        except WebDriverException:
+            return False
+
     def handle_popups(self):
         """Handle any popups that might appear"""
+        from selenium.common.exceptions import ElementClickInterceptedException, NoSuchElementException, StaleElementReferenceException
+
+        # Once the popup has been dismissed in this profile only check for it, don't wait
+        got_it_button = self.wait_for("//button[contains(text(), 'Got it')]", 0 if self._popups_dismissed else 2)
+        if got_it_button is None:
+            return
         try:
-            # Reduced wait time for popup
-            got_it_button = WebDriverWait(self.driver, 2).until(  # Reduced from 5 to 2
-                EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Got it')]"))
-            )
             got_it_button.click()
-            # time.sleep(0.5)  # Reduced from 1 to 0.5
-        except (TimeoutException, ElementClickInterceptedException, NoSuchElementException):
+            self._popups_dismissed = True
+            if self.profile_dir:
+                open(os.path.join(self.profile_dir, "popups_dismissed"), 'w').close()
+        except (ElementClickInterceptedException, NoSuchElementException, StaleElementReferenceException):
             pass
 
+    def _is_blocked_page(self):
+        """Check whether the current page is a challenge or block page"""
+        try:
+            page_text = self.driver.execute_script(
+                "return (document.title + ' ' + (document.body ? document.body.innerText.slice(0, 2000) : '')).toLowerCase();"
+            )
+        except Exception:
+            return False
+        return any(marker in page_text for marker in BLOCK_MARKERS)
+
+    def _record_page_load(self, start, timed_out=False):
+        """Report a finished page load to the rate controller, returning True if it was healthy"""
+        latency = time.monotonic() - start
+        blocked = not timed_out and self._is_blocked_page()
+        self.rate_controller.record(latency, timed_out=timed_out, blocked=blocked)
+        if timed_out or blocked:
+            self.update_status(f"Page load {'timed out' if timed_out else 'hit a block page'} after {latency:.1f}s")
+            return False
+        return True
+
+    def _load_page(self, url):
+        """Load a URL at the pace set by the rate controller, backing off on timeouts and block pages"""
+        from selenium.common.exceptions import TimeoutException
+
+        for attempt in range(PAGE_LOAD_RETRIES + 1):
+            # Launch Chrome first, so its startup doesn't hold a slot or count as page latency
+            driver = self.driver
+            with self.rate_controller.slot():
+                start = time.monotonic()
+                timed_out = False
+                try:
+                    driver.get(url)
+                except TimeoutException:
+                    timed_out = True
+                healthy = self._record_page_load(start, timed_out=timed_out)
+
+            metrics = self.rate_controller.metrics()
+            self.update_status(f"Current rate: {metrics['rate_per_sec']} pages/s, concurrency {metrics['concurrency']}")
+            if healthy:
+                return True
+            if attempt < PAGE_LOAD_RETRIES:
+                delay = self.rate_controller.backoff()
+                self.update_status(f"Backed off {delay:.1f}s before retrying")
+        return False
+
+    def get_result_count(self, url):
+        """
+        Load a search page and return the number of results Airbnb reports for it.
+        "Over 1,000" counts as 1000; returns None if the heading can't be read.
+        """
+        if not self._load_page(url):
+            return None
+        self.handle_popups()
+        _, heading = self.wait_for_any(RESULT_COUNT_SELECTORS, 10)
+        if heading is None:
+            self.update_status("Could not find the result count heading")
+            return None
+        text = heading.text.strip()
+        match = re.search(r"([\d,]+)\+?\s+(?:homes?|places?|stays?|results?)", text, re.IGNORECASE)
+        if not match:
+            self.update_status(f"Could not parse result count from: {text}")
+            return None
+        return int(match.group(1).replace(",", ""))
+
+    def reset_counters(self):
+        """Zero the per-run counters reported by get_metrics"""
+        self.counters = {"duplicates_skipped": 0, "partial_listings": 0, "query_rejected": 0}
+
+    def stop(self):
+        """Ask a running iter_listings to finish after the listing it is on"""
+        self.stop_event.set()
+
+    def get_metrics(self):
+        """Return the current scraping metrics, including the adaptive request rate"""
+        return {**self.rate_controller.metrics(), **self.lifecycle.metrics(), **self.counters, "tabs": self.tabs}
+
+    def recycle_driver(self, resume_url, reason):
+        """Replace the browser with a fresh one and reopen the search page we were on"""
+        self.update_status(f"\nRecycling browser ({reason})...")
+        rss_before = self.lifecycle.browser_rss(self.driver)
+        try:
+            self.close()
+        except Exception as e:
+            self.update_status(f"Error closing old browser: {str(e)}")
+            self._driver = None
+
+        self.setup_driver()
+        self._load_page(resume_url)
+        self.handle_popups()
+
+        rss_after = self.lifecycle.browser_rss(self.driver)
+        reclaimed = self.lifecycle.recycled(rss_before, rss_after)
+        self.update_status(
+            f"Browser recycled, reclaimed {reclaimed / 1024 / 1024:.0f} MB "
+            f"(recycle #{self.lifecycle.recycle_count})"
+        )
+
+    def _get_grid_item_link(self, item):
+        """The detail-page URL of a grid item, or None if it has no room link"""
+        from selenium.webdriver.common.by import By
+        from selenium.common.exceptions import NoSuchElementException
+
+        try:
+            return item.find_element(By.CSS_SELECTOR, "a[href*='/rooms/']").get_attribute("href")
+        except NoSuchElementException:
+            return None
+
+    def _get_grid_item_room_id(self, item):
+        """Read the room ID from a grid item's link without clicking it"""
+        return self._extract_room_id(self._get_grid_item_link(item))
+
+    def _read_grid_item(self, item, room_id, num_nights):
+        """Read the rating and price shown on a grid card, before its detail page is opened"""
+        # Parse the card's own text, like grid mode does, so each card reports its own values
+        try:
+            card_text = item.get_attribute("innerText") or ""
+        except Exception as e:
+            self.update_status(f"Warning: Could not read grid card: {str(e)}")
+            card_text = ""
+
+        rating, review_count = parse_rating(card_text)
+        if rating is not None:
+            self.update_status(f"Found rating: {rating:g} with {review_count} reviews")
+        else:
+            review_count = 0  # Unrated cards have no reviews yet
+            self.update_status("Could not parse rating text")
+
+        total_price, price_per_night = parse_price_text(card_text, num_nights)
+        if total_price is not None or price_per_night is not None:
+            self.update_status(f"Found price: ${total_price}, ${price_per_night} per night for {num_nights} nights")
+        else:
+            self.update_status("Warning: Could not extract price information")
+            num_nights = None
+
+        return {
+            "room_id": room_id,
+            "url": self._get_grid_item_link(item),
+            "rating": rating,
+            "review_count": review_count,
+            "total_price": total_price,
+            "price_per_night": price_per_night,
+            "num_nights": num_nights
+        }
+
+    def _extract_listing(self, card, deadline, details=None):
+        """
+        Build a Listing from the detail page in the current tab, plus what its grid card
+        showed. Pass the page's payload fields as `details` to skip reading the DOM.
+        """
+        from selenium.webdriver.common.by import By
+
+        if details is not None:
+            return self._listing_from_payload(card, details)
+
+        # Define XPaths
+        xpaths = {
+            "name": '//*[@id="site-content"]/div/div[1]/div[1]/div[1]/div/div/div/div/div/section/div/div[1]/div/h1',
+            "guests": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[1]',
+            "bedrooms": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[2]',
+            "beds": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[3]',
+            "baths": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[4]',
+            "location_rating": '//*[@id="site-content"]/div/div[1]/div[4]/div/div/div/div[2]/div/section/div[2]/div/div/div[3]/div/div/div/div/div[6]/div/div/div[2]/div[2]'
+        }
+
+        # Get listing details using existing XPaths and logic
+    
+        # Find and scroll to location rating element (it's usually at the bottom)
+        location_element = self.wait_for(xpaths["location_rating"], 10, deadline=deadline)
+        if location_element is not None:
+            self.scroll_to_element(location_element)
+        else:
+            self.update_status("Warning: Could not find location rating section")
+
+        # Extract all details
+        details = {}
+        self.update_status("\nExtracting listing details:")
+        self.update_status("-" * 30)
+        # One in-page wait for every field, so missing fields share a single timeout
+        elements = self.wait_for_all(list(xpaths.values()), 5, deadline)
+        for key, element in zip(xpaths, elements):
+            try:
+                details[key] = element.text
+                self.update_status(f"{key}: {details[key]}")
+            except:
+                details[key] = "N/A"
+                self.update_status(f"{key}: N/A (not found)")
+    
+        # Process details and create listing object
+        listing = Listing(
+            url=self.driver.current_url,
+            name=to_text(details["name"]),
+            room_id=to_text(card["room_id"]),
+            guest_limit=to_int(self._extract_number(details["guests"])),
+            bedrooms=to_int(self._extract_number(details["bedrooms"])),
+            beds=to_int(self._extract_number(details["beds"])),
+            bathrooms=to_float(self._extract_number(details["baths"])),
+            stars=to_float(card["rating"]),
+            review_count=to_int(card["review_count"]),
+            price_per_night=to_int(card["price_per_night"]),
+            total_price=to_int(card["total_price"]),
+            number_of_nights=to_int(card["num_nights"]),
+            location_rating=to_float(details.get("location_rating"))
+        )
+    
+        try:
+            # Check for Guest Favorite badge
+            try:
+                guest_favorite = self.driver.find_element(
+                    By.XPATH,
+                    '//*[@id="site-content"]/div/div[1]/div[4]/div/div/div/div[2]/div/section/div[1]/div[2]'
+                ).is_displayed()
+                self.update_status(f"Guest Favorite: {guest_favorite}")
+            except:
+                guest_favorite = False
+                self.update_status("Guest Favorite badge not found")
+            listing.is_guest_favorite = guest_favorite
+            if self._rejected(listing, ("guest_favorite",)):
+                return None
+
+            # Get full page content for historical analysis
+            full_content = self.driver.find_element(
+                By.XPATH,
+                '//*[@id="site-content"]/div/div[1]'
+            ).text
+        
+            # Check for historical house using simple text matching
+            historical_analysis = self.check_historical_house(full_content, deadline)
+            self.update_status(f"\nHistorical analysis: {json.dumps(historical_analysis, indent=2)}")
+
+            listing.is_historical = historical_analysis["is_historical"]
+            listing.historical_evidence = historical_analysis["evidence"]
+            if self._rejected(listing, ("historical",)):
+                return None
+
+            # Get amenities text
+            amenities_text = self.get_amenities_text(deadline)
+            if amenities_text:
+                self.update_status("\nAnalyzing amenities with text matching...")
+                amenities_analysis = self.check_amenities_with_text_matching(amenities_text)
+                if amenities_analysis:
+                    listing.set_amenities(amenities_analysis)
+                    # print("\nAmenities analysis:")
+                    # print(json.dumps(amenities_analysis, indent=2))
+        except Exception as e:
+            self.update_status(f"Error processing amenities: {str(e)}")
+    
+        if self._rejected(listing, ALL_FIELDS):
+            return None
+
+        # Waits that ran out of budget came back empty, so flag the listing
+        if deadline.expired():
+            listing.partial = True
+            self.counters["partial_listings"] += 1
+            self.update_status(
+                f"Listing budget of {self.listing_budget}s ran out, saving it as partial"
+            )
+
+        self.update_status("\nProcessed listing details:")
+        self.update_status("-" * 30)
+        self.update_status(json.dumps(listing.to_record(), indent=2))
+    
+        # After all extractions, check for missing fields
+        missing_fields = listing.missing_fields()
+        if missing_fields:
+            self.update_status(f"\nAttempting to extract missing fields: {missing_fields}")
+            # additional_details = self.extract_missing_details(full_content, missing_fields)
+            # for field, value in additional_details.items():
+            #     if field in missing_fields and value:
+            #         setattr(listing, field, value)
+            #         self.update_status(f"Updated {field} to: {value}")
+
+        return listing
+
+    def _listing_from_payload(self, card, details):
+        """Build a Listing from the fields of a detail-page payload, plus what its grid card showed"""
+        # The payload's rating is the listing's own; the card's is only a fallback
+        if details["stars"] is not None:
+            stars, review_count = details["stars"], details["review_count"]
+        else:
+            stars, review_count = to_float(card["rating"]), None
+        if review_count is None:
+            review_count = to_int(card["review_count"])
+        listing = Listing(
+            url=self.driver.current_url,
+            name=details["name"],
+            room_id=to_text(card["room_id"]),
+            guest_limit=details["guest_limit"],
+            bedrooms=details["bedrooms"],
+            beds=details["beds"],
+            bathrooms=details["bathrooms"],
+            stars=stars,
+            review_count=review_count,
+            price_per_night=to_int(card["price_per_night"]),
+            total_price=to_int(card["total_price"]),
+            number_of_nights=to_int(card["num_nights"]),
+            location_rating=details["location_rating"],
+            is_guest_favorite=details["is_guest_favorite"]
+        )
+
+        historical_analysis = self._scan_historical_text(
+            "\n".join(text for text in (details["name"], details["description"]) if text)
+        )
+        listing.is_historical = historical_analysis["is_historical"]
+        listing.historical_evidence = historical_analysis["evidence"]
+        if details["amenities_text"]:
+            listing.set_amenities(self.check_amenities_with_text_matching(details["amenities_text"]))
+        if self._rejected(listing, ALL_FIELDS):
+            return None
+
+        self.update_status("\nProcessed listing details from the page payload:")
+        self.update_status("-" * 30)
+        self.update_status(json.dumps(listing.to_record(), indent=2))
+        return listing
+
+    def _card_listing(self, card):
+        """The part of a Listing a grid card shows, for checking card predicates"""
+        stars = to_float(card["rating"])
+        return Listing(
+            room_id=card["room_id"],
+            stars=stars,
+            # Without a rating the review count is just the default
+            review_count=to_int(card["review_count"]) if stars is not None else None,
+            price_per_night=to_int(card["price_per_night"])
+        )
+
+    def _rejected(self, listing, fields, known_only=False):
+        """Check a listing against the run's query, logging why it doesn't match"""
+        if self.query is None:
+            return False
+        reason = self.query.mismatch(listing, fields, known_only=known_only)
+        if reason is None:
+            return False
+        self.counters["query_rejected"] += 1
+        self.update_status(f"Skipping room {listing.room_id}, it doesn't match the query ({reason})")
+        return True
+
+    def _limit_reached(self, processed):
+        return self.query is not None and self.query.limit_reached(processed)
+
+    def _detail_payload(self, room_id, deadline, timeout=DETAIL_LOAD_TIMEOUT):
+        """Fields of the listing's StaysPdpSections payload, or None if capture is off or none arrived"""
+        if self.capture is None:
+            return None
+        details = self.capture.wait_for(
+            PDP_OPERATION, parse_pdp_payload, timeout,
+            match=lambda url: is_pdp_for(url, room_id), deadline=deadline
+        )
+        if details is None:
+            self.update_status("No listing payload captured, reading the page instead")
+        return details
+
+    def _search_payload_listings(self, num_nights):
+        """Listings from the search page's StaysSearch payload, or None if capture is off or none arrived"""
+        if self.capture is None:
+            return None
+        listings = self.capture.wait_for(
+            SEARCH_OPERATION, lambda payload: parse_search_payload(payload, num_nights), 5
+        )
+        if not listings:
+            self.update_status("No search payload captured, reading the grid cards instead")
+            return None
+        self.update_status(f"Extracted {len(listings)} listings from the search payload")
+        return listings
+
+    def _scrape_in_tabs(self, cards, search_url, original_window):
+        """
+        Yield a Listing for each grid card while keeping up to `self.tabs` detail pages
+        loading at once. Whichever tab finishes first is extracted, closed and replaced
+        by the next card, so the network waits of several listings overlap.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        pending = deque(card for card in cards if card["url"])
+        loading = {}  # window handle -> (card, load start)
+        try:
+            while pending or loading:
+                if self.stop_event.is_set():
+                    break
+
+                # Top up the open tabs, unless the browser is due to be recycled. Each
+                # loading tab holds a rate controller slot, so after a cut in concurrency
+                # only the first tab waits for one and the rest wait for tabs to finish
+                recycle_reason = None
+                while pending and len(loading) < self.tabs:
+                    recycle_reason = self.lifecycle.should_recycle(self.driver)
+                    if recycle_reason:
+                        break
+                    if not self.rate_controller.enter(block=not loading):
+                        break
+                    card = pending.popleft()
+                    try:
+                        self.driver.switch_to.new_window('tab')
+                        # Navigating from script returns at once, unlike driver.get
+                        self.driver.execute_script("window.location.href = arguments[0];", card["url"])
+                    except BaseException:
+                        self.rate_controller.leave()
+                        raise
+                    loading[self.driver.current_window_handle] = (card, time.monotonic())
+                    self.lifecycle.note_listing()
+                if recycle_reason and not loading:
+                    self.recycle_driver(search_url, recycle_reason)
+                    original_window = self.driver.current_window_handle
+                    continue
+
+                ready = self._next_ready_tab(loading)
+                if ready is None:
+                    time.sleep(TAB_POLL_SECONDS)
+                    continue
+                handle, timed_out = ready
+                card, load_start = loading.pop(handle)
+                self.rate_controller.leave()
+                self.driver.switch_to.window(handle)
+                if not self._record_page_load(load_start, timed_out=timed_out):
+                    self.rate_controller.backoff()
+
+                self.update_status(f"\n{'='*50}")
+                self.update_status(f"Processing listing {card['room_id']} ({len(loading)} more tabs loading)")
+                self.update_status(f"{'='*50}")
+                try:
+                    # The page load is already bounded, so the budget covers extraction only
+                    deadline = Deadline(self.listing_budget)
+                    # A loaded tab has its payload already, so don't wait for one
+                    details = self._detail_payload(card["room_id"], deadline, timeout=0)
+                    listing = self._extract_listing(card, deadline, details)
+                    if listing is not None:
+                        self._write_listing(listing)
+                except Exception as e:
+                    self.update_status(f"\nError processing listing {card['url']}: {str(e)}")
+                    self._listing_failed(card["room_id"])
+                    listing = None
+                self.driver.close()
+                self.driver.switch_to.window(original_window)
+                if listing is not None:
+                    yield listing
+        finally:
+            for handle in loading:
+                self.rate_controller.leave()
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except WebDriverException:
+                    pass
+            try:
+                self.driver.switch_to.window(original_window)
+            except WebDriverException:
+                pass
+
+    def _next_ready_tab(self, loading):
+        """Return (handle, timed out) for a tab that is done loading or out of time, else None"""
+        now = time.monotonic()
+        for handle, (card, load_start) in loading.items():
+            self.driver.switch_to.window(handle)
+            if self.driver.execute_script(TAB_READY_JS):
+                return handle, False
+            if now - load_start > DETAIL_LOAD_TIMEOUT:
+                return handle, True
+        return None
+
+    def _is_new_room(self, room_id):
+        """Check a room ID against the rooms already seen, counting duplicates"""
+        if self.deduper.check_and_add(room_id):
+            return True
+        self.counters["duplicates_skipped"] += 1
+        self.update_status(f"Skipping room {room_id}, it was already scraped")
+        if self.delta is not None:
+            # Still part of this search, even if another search got to scrape it
+            self.delta.carry_over(room_id)
+        return False
+
+    def _listing_failed(self, room_id):
+        """Let a room whose detail visit failed be tried again, without reporting it as gone"""
+        self.deduper.release(room_id)
+        if self.delta is not None:
+            self.delta.carry_over(room_id)
+
+    def _wait_for_grid_items(self):
+        """Wait for the search-result grid and return its items"""
+        from selenium.webdriver.common.by import By
+        from selenium.common.exceptions import TimeoutException
+
+        if self.wait_for(GRID_ITEMS_XPATH, 5) is None:
+            # An empty grid is the softest form of blocking, so slow down
+            self.rate_controller.record(blocked=True)
+            raise TimeoutException("Listings grid did not load")
+        return self.driver.find_elements(By.XPATH, GRID_ITEMS_XPATH)
+
     def scroll_to_element(self, element):
         """Scroll to a specific element using JavaScript with better reliability"""
         try:
@@ -165,8 +895,10 @@ class AirbnbScraper:
         #         "error": str(e)
         #     }
 
-    def get_amenities_text(self):
+    def get_amenities_text(self, deadline=None):
         """Get amenities text from modal or fall back to page text"""
+        from selenium.webdriver.common.by import By
+
         try:
             self.update_status("\nTrying to access amenities...")
             
@@ -182,19 +914,10 @@ class AirbnbScraper:
                 "//button[.//span[contains(text(), 'Show all')]]"
             ]
             
-            show_all_button = None
-            for selector in selectors:
-                try:
-                    show_all_button = WebDriverWait(self.driver, 3).until(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
-                    if show_all_button:
-                        self.update_status(f"Found button using selector: {selector}")
-                        break
-                except:
-                    continue
-            
-            if not show_all_button:
+            matched, show_all_button = self.wait_for_any(selectors, 3, deadline=deadline)
+            if show_all_button:
+                self.update_status(f"Found button using selector: {selectors[matched]}")
+            else:
                 raise Exception("Could not find 'Show all amenities' button with any selector")
             
             self.update_status("Found button, scrolling to it...")
@@ -216,32 +939,19 @@ class AirbnbScraper:
                 "//div[contains(@aria-label, 'amenities')]"  # Aria label
             ]
             
-            modal = None
-            for selector in modal_selectors:
-                try:
-                    if selector.startswith("//"):
-                        modal = WebDriverWait(self.driver, 3).until(
-                            EC.presence_of_element_located((By.XPATH, selector))
-                        )
-                    else:
-                        modal = WebDriverWait(self.driver, 3).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                        )
-                    if modal:
-                        self.update_status(f"Found modal using selector: {selector}")
-                        break
-                except:
-                    continue
+            matched, modal = self.wait_for_any(modal_selectors, 3, deadline=deadline)
+            if modal:
+                self.update_status(f"Found modal using selector: {modal_selectors[matched]}")
             
             if not modal:
                 self.update_status("Could not access modal, falling back to page text...")
                 # Get amenities section from the main page
-                amenities_section = WebDriverWait(self.driver, 3).until(
-                    EC.presence_of_element_located((
-                        By.XPATH,
-                        '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[7]/div/div[2]/section'
-                    ))
+                amenities_section = self.wait_for(
+                    '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[7]/div/div[2]/section', 3,
+                    deadline=deadline
                 )
+                if amenities_section is None:
+                    raise Exception("Could not find the amenities section on the page")
                 amenities_text = amenities_section.text
                 if amenities_text:
                     self.update_status("Successfully retrieved amenities from page")
@@ -271,16 +981,16 @@ class AirbnbScraper:
                 self.update_status("Could not get any amenities text")
                 return None
 
-    def check_historical_house(self, page_text):
+    def check_historical_house(self, page_text, deadline=None):
         """Check if the listing is a historical house using simple text matching"""
         try:
             # Get description directly from the element with updated XPath
-            description_element = WebDriverWait(self.driver, 3).until(
-                EC.presence_of_element_located((
-                    By.XPATH,
-                    '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[5]/div/div[2]/div[1]'  # Updated XPath
-                ))
+            description_element = self.wait_for(
+                '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[5]/div/div[2]/div[1]', 3,  # Updated XPath
+                deadline=deadline
             )
+            if description_element is None:
+                raise Exception("description did not appear")
             description_text = description_element.text
             if description_text:
                 page_text = f"{page_text}\n{description_text}"
@@ -291,6 +1001,10 @@ class AirbnbScraper:
             # Continue with existing page_text if we can't get the description
             pass
 
+        return self._scan_historical_text(page_text)
+
+    def _scan_historical_text(self, page_text):
+        """Look for historical terms in listing text, with some context around each match"""
         historical_terms = [
             'historic', 'historical', 'history'
         ]
@@ -368,9 +1082,9 @@ class AirbnbScraper:
             next_button_xpath = '//*[@id="site-content"]/div/div[3]/div/div/div/nav/div/a[last()]'  # Last <a> tag in nav
             
             try:
-                next_button = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located((By.XPATH, next_button_xpath))
-                )
+                next_button = self.wait_for(next_button_xpath, 5)
+                if next_button is None:
+                    raise Exception("Next button did not appear")
                 
                 self.update_status(f"\nFound next button: {next_button.get_attribute('aria-label')}")
                 
@@ -396,346 +1110,303 @@ class AirbnbScraper:
             self.update_status(f"Error in get_next_page_link: {str(e)}")
             return None
 
-    def update_output_files(self, listing_details):
-        """Update both JSON and CSV files with new listing data"""
+    def _write_listing(self, listing):
+        """Write a listing to the output files, and only then record it as scraped for later runs"""
+        if self.update_output_files(listing):
+            self.deduper.commit(listing.room_id)
+        else:
+            self.deduper.release(listing.room_id)
+
+    def update_output_files(self, listing):
+        """Update both JSON and CSV files with new listing data, returning whether they were written"""
         try:
-            # Prepare the reformatted data
-            reformatted_data = {
-                "Link": listing_details.get("url", ""),
-                "Name": listing_details.get("name", ""),
-                "Bedrooms": listing_details.get("bedrooms", ""),
-                "Beds": listing_details.get("beds", ""),
-                "Bathrooms": listing_details.get("bathrooms", ""),
-                "Guest Limit": listing_details.get("guest_limit", ""),
-                "Stars": listing_details.get("stars", ""),
-                "Price/Night in May": listing_details.get("price_per_night", ""),
-                "AirBnB Location Rating": listing_details.get("location_rating", ""),
-                "Source": "Airbnb",
-                "Amenities": "",  # Blank as requested
-                "TV": "TRUE" if listing_details.get("amenities_analysis", {}).get("TV", False) else "FALSE",
-                "Pool": "TRUE" if listing_details.get("amenities_analysis", {}).get("Pool", False) else "FALSE",
-                "Jacuzzi": "TRUE" if listing_details.get("amenities_analysis", {}).get("Jacuzzi", False) else "FALSE",
-                "Historical House": "TRUE" if listing_details.get("is_historical", False) else "FALSE",
-                "Billiards Table": "TRUE" if listing_details.get("amenities_analysis", {}).get("Billiards/Pool Table", False) else "FALSE",
-                "Large Yard": "TRUE" if listing_details.get("amenities_analysis", {}).get("Large Yard", False) else "FALSE",
-                "Balcony": "TRUE" if listing_details.get("amenities_analysis", {}).get("Balcony", False) else "FALSE",
-                "Laundry": "TRUE" if listing_details.get("amenities_analysis", {}).get("Laundry", False) else "FALSE",
-                "Home Gym": "TRUE" if listing_details.get("amenities_analysis", {}).get("Home Gym", False) else "FALSE",
-                "Guest Favorite Status": "TRUE" if listing_details.get("is_guest_favorite", False) else "FALSE"
-            }
-            
-            # Update JSON file
-            with open(self.json_file, 'r') as f:
-                current_data = json.load(f)
-            
-            current_data.append(reformatted_data)
+            record = listing.to_record()
+            record_json = json.dumps(record)
+            row = listing.to_row()
             
-            with open(self.json_file, 'w') as f:
-                json.dump(current_data, f, indent=2)
+            if self.delta is not None:
+                self.delta.add(listing.room_id, record)
+
+            # Update JSON file in place: overwrite the closing bracket instead of
+            # re-reading and re-writing every record we already have
+            with open(self.json_file, 'r+b') as f:
+                f.seek(-2, os.SEEK_END)
+                separator = ",\n" if self.json_record_count else "\n"
+                f.write(f"{separator}{record_json}\n]".encode('utf-8'))
+            self.json_record_count += 1
             
             # Update CSV file
             with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    reformatted_data["Link"],
-                    reformatted_data["Name"],
-                    reformatted_data["Bedrooms"],
-                    reformatted_data["Beds"],
-                    reformatted_data["Bathrooms"],
-                    reformatted_data["Guest Limit"],
-                    reformatted_data["Stars"],
-                    reformatted_data["Price/Night in May"],
-                    reformatted_data["AirBnB Location Rating"],
-                    reformatted_data["Source"],
-                    reformatted_data["Amenities"],
-                    reformatted_data["TV"],
-                    reformatted_data["Pool"],
-                    reformatted_data["Jacuzzi"],
-                    reformatted_data["Historical House"],
-                    reformatted_data["Billiards Table"],
-                    reformatted_data["Large Yard"],
-                    reformatted_data["Balcony"],
-                    reformatted_data["Laundry"],
-                    reformatted_data["Home Gym"],
-                    reformatted_data["Guest Favorite Status"]
-                ])
+                writer.writerow(row)
+
+            self.aggregates.add(listing)
+            if self.exports is not None:
+                self.exports.add(record_json, row)
             
             self.update_status(f"\nUpdated output files in {self.run_dir}")
+            return True
             
         except Exception as e:
             self.update_status(f"Error updating output files: {str(e)}")
+            return False
 
-    def scrape_url(self, url, num_pages=5):
+    def _get_num_nights(self):
+        """Get the number of nights from the date range in the search header"""
+        date_range_xpath = '/html/body/div[5]/div/div/div[1]/div/div[3]/header/div[1]/div/div/div/div/div[2]/div[1]/div/span[2]/button[2]/div'
+        try:
+            date_element = self.wait_for(date_range_xpath, 5)
+            if date_element is None:
+                raise Exception("date range did not appear")
+            date_text = date_element.text.strip()
+            self.update_status(f"Found date range: {date_text}")
+            
+            num_nights = self._nights_from_date_range(date_text)
+            if num_nights is not None:
+                self.update_status(f"Calculated {num_nights} nights from date range")
+            else:
+                num_nights = "2"  # Default if we can't parse the dates
+                self.update_status("Could not parse dates, using default 2 nights")
+        except Exception as e:
+            self.update_status(f"Error getting date range: {str(e)}, using default 2 nights")
+            num_nights = "2"
+        return num_nights
+
+    def _nights_from_date_range(self, date_text):
+        """Number of nights in a header date range, or None if it can't be parsed"""
+        # Formats: "Apr 18 – 20", "Dec 28 – Jan 3" (the stay crosses into the next
+        # month or year) and "May 2 – 9, 2025"
+        match = DATE_RANGE_PATTERN.search(date_text)
+        if not match:
+            return None
+        start_month = MONTHS.get(match.group(1)[:3].lower())
+        end_month = MONTHS.get(match.group(3)[:3].lower()) if match.group(3) else start_month
+        if start_month is None or end_month is None:
+            return None
+        year = int(match.group(5)) if match.group(5) else datetime.now().year
+        try:
+            check_in = datetime(year, start_month, int(match.group(2)))
+            check_out = datetime(year + (end_month < start_month), end_month, int(match.group(4)))
+        except ValueError:
+            return None
+        nights = (check_out - check_in).days
+        return str(nights) if nights > 0 else None
+
+    def scrape_url(self, url, num_pages=5, mode="full", query=None):
         """
         Scrape Airbnb listings from a direct URL with pagination
         Args:
             url (str): Complete Airbnb search URL
             num_pages (int): Number of pages to scrape
+            mode (str): "full" visits every listing's detail page, "grid" only
+                reads the search-result cards (name, URL, price, rating, badge)
+            query (ListingQuery): Only keep listings matching its predicates, and
+                stop after its limit. Card predicates are checked before clicking.
+        Returns:
+            list: All scraped Listing objects. Use iter_listings to stream them instead.
+        """
+        return list(self.iter_listings(url, num_pages=num_pages, mode=mode, query=query))
+
+    def iter_listings(self, url, num_pages=5, mode="full", query=None):
+        """
+        Yield each Listing as soon as it has been scraped and written to the output files.
+        Takes the same arguments as scrape_url but keeps no list of past listings.
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+
+        if mode not in SCRAPE_MODES:
+            raise ValueError(f"Unknown scrape mode {mode!r}, expected one of {SCRAPE_MODES}")
+        if mode == "grid" and query is not None and query.needs_detail:
+            raise ValueError("Amenity and historical filters need the detail pages, use full mode")
+        self.query = query
+        self.last_error = None
+
+        if self.run_dir is None:
+            self.start_run()
+
+        # Compare this run against the previous run of the same search as we go
+        self.delta = DeltaTracker(url, mode)
+        with open(os.path.join(self.run_dir, "run.json"), 'w') as f:
+            json.dump({
+                "search_url": url,
+                "search_key": search_key(url),
+                "mode": mode,
+                "num_pages": num_pages,
+                "query": asdict(query) if query is not None else None,
+                "started_at": datetime.now().isoformat(timespec="seconds")
+            }, f, indent=2)
+        completed = False
+
         try:
             current_page = 1
-            all_listings = []
+            processed = 0
+            page_failed = False
             
             # Add page parameter to URL if not present
             if 'page=' not in url:
                 url = f"{url}&page=1" if '?' in url else f"{url}?page=1"
             
             while current_page <= num_pages:
+                if self.stop_event.is_set():
+                    self.update_status("\nScrape stopped on request")
+                    break
+                if self._limit_reached(processed):
+                    self.update_status(f"\nFound {processed} matching listings, ending scrape")
+                    break
+
                 self.update_status(f"\n{'='*50}")
                 self.update_status(f"Processing page {current_page} of {num_pages}")
                 self.update_status(f"{'='*50}")
                 
                 # Load the page
                 self.update_status(f"\nLoading URL: {url}")
-                self.driver.get(url)
-                # time.sleep(1.5)
+                if self.capture is not None:
+                    # Payloads of the previous page must not be mistaken for this one's
+                    self.capture.reset()
+                if not self._load_page(url):
+                    self.update_status("Search page kept failing to load, ending scrape")
+                    self.last_error = f"Search page {current_page} kept failing to load"
+                    page_failed = True
+                    break
                 
                 # Handle popups
                 self.handle_popups()
                 
                 try:
-                    # Get number of nights from the date range in header
-                    date_range_xpath = '/html/body/div[5]/div/div/div[1]/div/div[3]/header/div[1]/div/div/div/div/div[2]/div[1]/div/span[2]/button[2]/div'
-                    try:
-                        date_element = WebDriverWait(self.driver, 5).until(
-                            EC.presence_of_element_located((By.XPATH, date_range_xpath))
-                        )
-                        date_text = date_element.text.strip()
-                        self.update_status(f"Found date range: {date_text}")
-                        
-                        # Extract dates and calculate nights
-                        # Format example: "Apr 18 – 20"
-                        dates = re.findall(r'\d+', date_text)
-                        if len(dates) >= 2:
-                            num_nights = str(int(dates[1]) - int(dates[0]))
-                            self.update_status(f"Calculated {num_nights} nights from date range")
+                    num_nights = self._get_num_nights()
+
+                    if mode == "grid":
+                        # Everything we need is in the search payload, or else on the search-result cards
+                        page_listings = self._search_payload_listings(num_nights)
+                        if page_listings is None:
+                            self.update_status("Waiting for listings grid to load...")
+                            self._wait_for_grid_items()
+                            page_listings = self._parse_grid_cards(self.driver.page_source, num_nights)
+                            self.update_status(f"Extracted {len(page_listings)} listings from grid cards")
+                        for listing in page_listings:
+                            if self.stop_event.is_set() or self._limit_reached(processed):
+                                break
+                            if self._rejected(listing, ALL_FIELDS):
+                                continue
+                            if not self._is_new_room(listing.room_id):
+                                continue
+                            self._write_listing(listing)
+                            processed += 1
+                            yield listing
+                    else:
+                        # Process grid items (existing code)
+                        self.update_status("Waiting for listings grid to load...")
+                        grid_items = self._wait_for_grid_items()
+                        self.update_status(f"Found {len(grid_items)} listings to process")
+                        original_window = self.driver.current_window_handle
+
+                        if self.tabs > 1:
+                            # Read the cards on the grid first, then load their detail pages several tabs at a time
+                            cards = []
+                            for item in grid_items:
+                                room_id = self._get_grid_item_room_id(item)
+                                card = self._read_grid_item(item, room_id, num_nights)
+                                if self._rejected(self._card_listing(card), CARD_FIELDS, known_only=True):
+                                    continue
+                                if self._is_new_room(room_id):
+                                    cards.append(card)
+                            self.update_status(f"Loading {len(cards)} listings in {self.tabs} tabs")
+                            for listing in self._scrape_in_tabs(cards, url, original_window):
+                                processed += 1
+                                yield listing
+                                if self._limit_reached(processed):
+                                    break
                         else:
-                            num_nights = "2"  # Default if we can't parse the dates
-                            self.update_status("Could not parse dates, using default 2 nights")
-                    except Exception as e:
-                        self.update_status(f"Error getting date range: {str(e)}, using default 2 nights")
-                        num_nights = "2"
-
-                    # Process grid items (existing code)
-                    self.update_status("Waiting for listings grid to load...")
-                    grid_items = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_all_elements_located((
-                            By.XPATH, 
-                            '//*[@id="site-content"]/div/div[2]/div/div/div/div/div/div'
-                        ))
-                    )
-                    self.update_status(f"Found {len(grid_items)} listings to process")
-                    
-                    original_window = self.driver.current_window_handle
-                    
-                    # Iterate through each grid item
-                    for index, item in enumerate(grid_items, 1):
-                        try:
-                            self.update_status(f"\n{'='*50}")
-                            self.update_status(f"Processing listing {index} of {len(grid_items)}")
-                            self.update_status(f"{'='*50}")
-                            
-                            # Get rating and price info from grid item first
-                            try:
-                                # Get rating and reviews
-                                rating_element = WebDriverWait(item, 3).until(
-                                    EC.presence_of_element_located((
-                                        By.XPATH, 
-                                        '//*[@id="site-content"]/div/div[2]/div/div/div/div/div/div[1]/div/div[2]/div/div/div/div/div/div[2]/div[5]/span/span[3]'
-                                    ))
-                                )
-                                rating_text = rating_element.get_attribute("innerText")
-                                rating_match = re.match(r"([\d.]+)\s*\((\d+)\)", rating_text)
-                                if rating_match:
-                                    rating = rating_match.group(1)
-                                    review_count = rating_match.group(2)
-                                    self.update_status(f"Found rating: {rating} with {review_count} reviews")
-                                else:
-                                    rating = "N/A"
-                                    review_count = "0"
-                                    self.update_status("Could not parse rating text")
-
-                                # Multiple possible XPaths for price element
-                                price_xpaths = [
-                                    '//*[@id="site-content"]/div/div[2]/div/div/div/div/div/div[1]/div/div[2]/div/div/div/div/div/div[2]/div[4]/div[2]/div/div/span/div[1]/div/span/div/button/span[1]',
-                                    '//*/html/body/div[5]/div/div/div[1]/div/div[3]/div[1]/main/div[2]/div/div[2]/div/div/div/div/div/div[5]/div/div[2]/div/div/div/div/div/div[2]/div[4]/div[2]/div/div/span/div/span/div/button/span[1]',
-                                    "//span[@class='_hb913q']"  # CSS class-based selector as fallback
-                                ]
-                                
-                                # Try each price XPath until we find one that works
-                                price_element = None
-                                for xpath in price_xpaths:
-                                    try:
-                                        price_element = WebDriverWait(item, 3).until(
-                                            EC.presence_of_element_located((By.XPATH, xpath))
-                                        )
-                                        if price_element:
-                                            break
-                                    except:
-                                        continue
-
-                                if not price_element:
-                                    raise Exception("Could not find price element with any XPath")
-
-                                price_text = price_element.text.strip()
-                                total_price = ''.join(filter(str.isdigit, price_text))
-                                self.update_status(f"Found price: ${total_price}")
-
-                                # Calculate price per night using the number of nights from header
-                                try:
-                                    price_per_night = str(int(total_price) // int(num_nights))
-                                    self.update_status(f"Calculated ${price_per_night} per night for {num_nights} nights")
-                                except:
-                                    price_per_night = total_price
-                                    self.update_status("Could not calculate price per night, using total price")
-
-                            except Exception as e:
-                                self.update_status(f"Warning: Could not extract price information: {str(e)}")
-                                total_price = "N/A"
-                                num_nights = "N/A"
-                                price_per_night = "N/A"
-
-                            self.update_status("\nClicking listing and waiting for new tab...")
-                            item.click()
-                            
-                            # Switch to new tab with shorter timeout
-                            WebDriverWait(self.driver, 5).until(lambda d: len(d.window_handles) > 1)
-                            new_window = [window for window in self.driver.window_handles if window != original_window][0]
-                            self.driver.switch_to.window(new_window)
-                            self.update_status("Successfully switched to new tab")
-
-                            # Define XPaths
-                            xpaths = {
-                                "name": '//*[@id="site-content"]/div/div[1]/div[1]/div[1]/div/div/div/div/div/section/div/div[1]/div/h1',
-                                "guests": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[1]',
-                                "bedrooms": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[2]',
-                                "beds": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[3]',
-                                "baths": '//*[@id="site-content"]/div/div[1]/div[3]/div/div[1]/div/div[1]/div/div/div/section/div[2]/ol/li[4]',
-                                "location_rating": '//*[@id="site-content"]/div/div[1]/div[4]/div/div/div/div[2]/div/section/div[2]/div/div/div[3]/div/div/div/div/div[6]/div/div/div[2]/div[2]'
-                            }
-
-                            # Get listing details using existing XPaths and logic
-                            
-                            # Find and scroll to location rating element (it's usually at the bottom)
-                            try:
-                                location_element = WebDriverWait(self.driver, 10).until(
-                                    EC.presence_of_element_located((By.XPATH, xpaths["location_rating"]))
-                                )
-                                self.scroll_to_element(location_element)
-                            except:
-                                self.update_status("Warning: Could not find location rating section")
-
-                            # Extract all details
-                            details = {}
-                            self.update_status("\nExtracting listing details:")
-                            self.update_status("-" * 30)
-                            for key, xpath in xpaths.items():
-                                try:
-                                    element = WebDriverWait(self.driver, 5).until(  # Reduced from 10 to 5
-                                        EC.presence_of_element_located((By.XPATH, xpath))
-                                    )
-                                    details[key] = element.text
-                                    self.update_status(f"{key}: {details[key]}")
-                                except:
-                                    details[key] = "N/A"
-                                    self.update_status(f"{key}: N/A (not found)")
-                            
-                            # Process details and create listing object
-                            listing_details = {
-                                "name": details["name"],
-                                "guest_limit": self._extract_number(details["guests"]),
-                                "bedrooms": self._extract_number(details["bedrooms"]),
-                                "beds": self._extract_number(details["beds"]),
-                                "bathrooms": self._extract_number(details["baths"]),
-                                "stars": rating,
-                                "review_count": review_count,
-                                "price_per_night": price_per_night,
-                                "total_price": total_price,
-                                "number_of_nights": num_nights,
-                                "location_rating": details.get("location_rating", "N/A"),
-                                "url": self.driver.current_url
-                            }
-                            
-                            try:
-                                # Check for Guest Favorite badge
+                            # Iterate through each grid item by position, so the grid can be
+                            # re-read after the browser is recycled mid-page
+                            for index in range(1, len(grid_items) + 1):
+                                if self.stop_event.is_set() or self._limit_reached(processed):
+                                    break
+                                recycle_reason = self.lifecycle.should_recycle(self.driver)
+                                if recycle_reason:
+                                    self.recycle_driver(url, recycle_reason)
+                                    grid_items = self._wait_for_grid_items()
+                                    original_window = self.driver.current_window_handle
+                                if index > len(grid_items):
+                                    break
+                                item = grid_items[index - 1]
+
+                                room_id = self._get_grid_item_room_id(item)
+                                # Every wait for this listing comes out of one budget
+                                deadline = Deadline(self.listing_budget)
+                                # Get rating and price info from grid item first, so the
+                                # query can rule the listing out before it is clicked
+                                card = self._read_grid_item(item, room_id, num_nights)
+                                if self._rejected(self._card_listing(card), CARD_FIELDS, known_only=True):
+                                    continue
+                                # Skip repeated and promoted listings before paying for a detail visit
+                                if not self._is_new_room(room_id):
+                                    continue
+                                self.lifecycle.note_listing()
+
                                 try:
-                                    guest_favorite = self.driver.find_element(
-                                        By.XPATH,
-                                        '//*[@id="site-content"]/div/div[1]/div[4]/div/div/div/div[2]/div/section/div[1]/div[2]'
-                                    ).is_displayed()
-                                    self.update_status(f"Guest Favorite: {guest_favorite}")
-                                except:
-                                    guest_favorite = False
-                                    self.update_status("Guest Favorite badge not found")
-
-                                # Get full page content for historical analysis
-                                full_content = self.driver.find_element(
-                                    By.XPATH,
-                                    '//*[@id="site-content"]/div/div[1]'
-                                ).text
-                                
-                                # Check for historical house using simple text matching
-                                historical_analysis = self.check_historical_house(full_content)
-                                self.update_status(f"\nHistorical analysis: {json.dumps(historical_analysis, indent=2)}")
-
-                                # Update listing_details with new information
-                                listing_details.update({
-                                    "is_guest_favorite": guest_favorite,
-                                    "is_historical": historical_analysis["is_historical"],
-                                    "historical_evidence": historical_analysis["evidence"]
-                                })
-
-                                # Get amenities text
-                                amenities_text = self.get_amenities_text()
-                                if amenities_text:
-                                    self.update_status("\nAnalyzing amenities with text matching...")
-                                    amenities_analysis = self.check_amenities_with_text_matching(amenities_text)
-                                    if amenities_analysis:
-                                        listing_details["amenities_analysis"] = amenities_analysis
-                                        # print("\nAmenities analysis:")
-                                        # print(json.dumps(amenities_analysis, indent=2))
-                            except Exception as e:
-                                self.update_status(f"Error processing amenities: {str(e)}")
-                                listing_details["amenities_analysis"] = {}
-                            
-                            self.update_status("\nProcessed listing details:")
-                            self.update_status("-" * 30)
-                            self.update_status(json.dumps(listing_details, indent=2))
+                                    self.update_status(f"\n{'='*50}")
+                                    self.update_status(f"Processing listing {index} of {len(grid_items)}")
+                                    self.update_status(f"{'='*50}")
+
+                                    self.update_status("\nClicking listing and waiting for new tab...")
+                                    if self.capture is not None:
+                                        self.capture.reset()
+                                    # The detail load holds a slot like any other page load, and
+                                    # time spent waiting for our turn doesn't count against the listing
+                                    wait_start = time.monotonic()
+                                    with self.rate_controller.slot():
+                                        deadline.extend(time.monotonic() - wait_start)
+                                        load_start = time.monotonic()
+                                        item.click()
+
+                                        # Switch to new tab with shorter timeout
+                                        WebDriverWait(self.driver, max(deadline.timeout(5), 1)).until(lambda d: len(d.window_handles) > 1)
+                                        new_window = [window for window in self.driver.window_handles if window != original_window][0]
+                                        self.driver.switch_to.window(new_window)
+                                        self.update_status("Successfully switched to new tab")
+
+                                        # With network capture the payload is enough, without waiting for the page to render
+                                        details = self._detail_payload(room_id, deadline)
+                                        page_timed_out = details is None and not self.wait_for_page_load(DETAIL_LOAD_TIMEOUT, deadline)
+                                        healthy = self._record_page_load(load_start, timed_out=page_timed_out)
+                                    if not healthy:
+                                        self.rate_controller.backoff()
+
+                                    listing = self._extract_listing(card, deadline, details)
+                                    if listing is not None:
+                                        self._write_listing(listing)  # Update files in real-time
+
+                                    # After all processing is done, close current tab and switch back to grid
+                                    self.update_status("\nClosing listing tab and returning to grid...")
+                                    self.driver.close()
+                                    self.driver.switch_to.window(original_window)
+                                    self.update_status("Successfully returned to grid view")
+
+                                    if listing is not None:
+                                        processed += 1
+                                        yield listing
                             
-                            # After all extractions, check for missing fields
-                            missing_fields = [k for k, v in listing_details.items() if v == "N/A"]
-                            if missing_fields:
-                                self.update_status(f"\nAttempting to extract missing fields: {missing_fields}")
-                                # additional_details = self.extract_missing_details(full_content, missing_fields)
-                                # for field, value in additional_details.items():
-                                #     if field in missing_fields and value:
-                                #         listing_details[field] = value
-                                #         self.update_status(f"Updated {field} to: {value}")
-
-                            all_listings.append(listing_details)
-                            self.update_output_files(listing_details)  # Update files in real-time
-
-                            # After all processing is done, close current tab and switch back to grid
-                            self.update_status("\nClosing listing tab and returning to grid...")
-                            self.driver.close()
-                            self.driver.switch_to.window(original_window)
-                            self.update_status("Successfully returned to grid view")
-                        
-                        except Exception as e:
-                            self.update_status(f"\nError processing listing {index}: {str(e)}")
-                            # Make sure we're back on the original window
-                            if len(self.driver.window_handles) > 1 and self.driver.current_window_handle != original_window:
-                                self.update_status("Closing error tab and switching back to main window...")
-                                self.driver.close()
-                                self.driver.switch_to.window(original_window)
+                                except Exception as e:
+                                    self.update_status(f"\nError processing listing {index}: {str(e)}")
+                                    self._listing_failed(room_id)
+                                    # Make sure we're back on the original window
+                                    if len(self.driver.window_handles) > 1 and self.driver.current_window_handle != original_window:
+                                        self.update_status("Closing error tab and switching back to main window...")
+                                        self.driver.close()
+                                        self.driver.switch_to.window(original_window)
                     
                     self.update_status(f"\n{'='*50}")
-                    self.update_status(f"Final Results - Successfully processed {len(all_listings)} listings")
+                    self.update_status(
+                        f"Final Results - Successfully processed {processed} listings, "
+                        f"skipped {self.counters['duplicates_skipped']} duplicates"
+                    )
                     self.update_status(f"{'='*50}")
-                    self.update_status(json.dumps(all_listings, indent=2))
                     
                     # After processing all items in the current page
-                    if current_page < num_pages:
+                    if current_page < num_pages and not self.stop_event.is_set() and not self._limit_reached(processed):
                         # Find and click next page link
                         next_page = self.get_next_page_link()
                         if next_page:
@@ -751,17 +1422,43 @@ class AirbnbScraper:
                     
                 except Exception as e:
                     self.update_status(f"Error processing page {current_page}: {str(e)}")
+                    self.last_error = f"Error processing page {current_page}: {str(e)}"
+                    page_failed = True
                     break
                     
                 except TimeoutException:
                     self.update_status("Timeout waiting for listings to load")
                 except Exception as e:
                     self.update_status(f"Error processing listings: {str(e)}")
+
+            # Pages we never got through, or listings the query filtered out, don't
+            # tell us which listings disappeared
+            completed = not page_failed and not self.stop_event.is_set() and query is None
                 
         except Exception as e:
             self.update_status(f"Error in scrape_url: {str(e)}")
-        
-        return all_listings
+            self.last_error = f"Error in scrape_url: {str(e)}"
+        finally:
+            self.deduper.save()
+            try:
+                summary = self.delta.finish(self.delta_file, self.run_timestamp, complete=completed)
+                self.update_status(
+                    f"Delta since previous run: {summary['new']} new, {summary['changed']} changed, "
+                    f"{summary['disappeared']} disappeared ({self.delta_file})"
+                )
+            except Exception as e:
+                self.update_status(f"Error writing delta file: {str(e)}")
+            try:
+                stats = self.aggregates.summary()
+                with open(os.path.join(self.run_dir, "summary.json"), 'w') as f:
+                    json.dump(stats, f, indent=2)
+                price = stats["price_per_night"]
+                self.update_status(
+                    f"Run summary: {stats['listings']} listings, nightly price "
+                    f"min {price['min']} / median {price['median']} / p90 {price['p90']}"
+                )
+            except Exception as e:
+                self.update_status(f"Error writing run summary: {str(e)}")
     
     def _calculate_price_per_night(self, details):
         """Helper method to calculate price per night"""
@@ -775,6 +1472,8 @@ class AirbnbScraper:
     
     def _parse_page(self):
         """Parse the current page and extract listing information"""
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(self.driver.page_source, 'html.parser')
         listings = soup.find_all("div", {"itemprop": "itemListElement"})
         
@@ -798,6 +1497,66 @@ class AirbnbScraper:
                 self.update_status(f"Error parsing listing: {str(e)}")
                 continue
     
+    def _parse_grid_cards(self, page_source, num_nights):
+        """Extract Listings from the search-result cards without visiting detail pages"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page_source, 'html.parser')
+        cards = soup.find_all("div", {"itemprop": "itemListElement"})
+        
+        listings = []
+        for card in cards:
+            try:
+                listings.append(self._parse_grid_card(card, num_nights))
+            except Exception as e:
+                self.update_status(f"Error parsing grid card: {str(e)}")
+                continue
+        return listings
+
+    def _parse_grid_card(self, card, num_nights):
+        """Build a Listing from a single search-result card"""
+        url = self._get_text(card, "meta[itemprop='url']", attr='content')
+        if url == "N/A":
+            url = self._get_text(card, "a[href*='/rooms/']", attr='href')
+        if url.startswith("/"):
+            url = f"https://www.airbnb.com{url}"
+        elif url != "N/A" and not url.startswith("http"):
+            url = f"https://{url}"
+
+        name = self._get_text(card, "[data-testid='listing-card-name']")
+        if name == "N/A":
+            name = self._get_text(card, "meta[itemprop='name']", attr='content')
+
+        card_text = card.get_text(" ", strip=True)
+        total_price, price_per_night = parse_price_text(card_text, num_nights)
+
+        rating, review_count = parse_rating(card_text)
+        if rating is None:
+            review_count = 0  # Unrated cards have no reviews yet
+
+        badge = self._get_text(card, "[data-testid='listing-card-badge']")
+        if badge == "N/A":
+            badge = next((b for b in GRID_BADGES if b.lower() in card_text.lower()), "N/A")
+
+        return Listing(
+            url=to_text(url),
+            name=to_text(name),
+            room_id=to_text(self._extract_room_id(url)),
+            title=to_text(self._get_text(card, "[data-testid='listing-card-title']")),
+            stars=rating,
+            review_count=review_count,
+            price_per_night=price_per_night,
+            total_price=total_price,
+            number_of_nights=to_int(num_nights),
+            badge=to_text(badge),
+            is_guest_favorite=badge.lower() == "guest favorite"
+        )
+
+    def _extract_room_id(self, url):
+        """Pull the numeric room ID out of a listing URL"""
+        match = re.search(r"/rooms/(?:plus/)?(\d+)", url or "")
+        return match.group(1) if match else "N/A"
+
     def _get_text(self, element, selector, attr=None):
         """Helper method to safely extract text or attribute from an element"""
         try:
@@ -822,8 +1581,16 @@ class AirbnbScraper:
         self.update_status(f"CSV file: {self.csv_file}")
     
     def close(self):
-        """Close the browser"""
-        self.driver.quit()
+        """Close the browser, if one was started"""
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
+                self.capture = None
+                if self.profile_dir is not None:
+                    self.profiles.release(self.profile_dir)
+                    self.profile_dir = None
 
     def _extract_number(self, text):
         """Helper method to extract numeric values including decimals from text"""
@@ -908,16 +1675,57 @@ class AirbnbScraper:
         return results
 
 def main():
-    # Example usage
-    scraper = AirbnbScraper()
+    parser = argparse.ArgumentParser(description="Scrape Airbnb search results")
+    parser.add_argument("url", nargs="?", help="Complete Airbnb search URL (prompted for if omitted)")
+    parser.add_argument("--pages", type=int, help="Number of pages to scrape (default 5)")
+    parser.add_argument("--mode", choices=SCRAPE_MODES, help="full visits every listing, grid only reads the search cards")
+    parser.add_argument("--persistent-profile", action="store_true", help="Reuse a warm Chrome profile and HTTP cache across runs")
+    parser.add_argument("--cache-size-mb", type=int, default=512, help="Disk cache limit per persistent profile")
+    parser.add_argument("--tabs", type=int, default=1, help="Detail pages to load at once in full mode")
+    parser.add_argument("--listing-budget", type=float, default=LISTING_BUDGET,
+                        help="Seconds a listing may take in full mode before it is saved as partial")
+    parser.add_argument("--network-capture", action="store_true",
+                        help="Read listings from Airbnb's own JSON responses, falling back to the page when none arrive")
+    filters = parser.add_argument_group("query", "only keep matching listings, checked as early as possible")
+    filters.add_argument("--min-price", type=int, help="Minimum price per night")
+    filters.add_argument("--max-price", type=int, help="Maximum price per night")
+    filters.add_argument("--min-stars", type=float, help="Minimum star rating")
+    filters.add_argument("--min-reviews", type=int, help="Minimum number of reviews")
+    filters.add_argument("--amenity", action="append", default=[], choices=AMENITIES,
+                         help="Required amenity, may be repeated (full mode only)")
+    filters.add_argument("--historical", action="store_true", help="Only historical houses (full mode only)")
+    filters.add_argument("--guest-favorite", action="store_true", help="Only guest favorites")
+    filters.add_argument("--limit", type=int, help="Stop after this many matching listings")
+    args = parser.parse_args()
+
+    query = ListingQuery(
+        min_price_per_night=args.min_price,
+        max_price_per_night=args.max_price,
+        min_stars=args.min_stars,
+        min_reviews=args.min_reviews,
+        amenities=tuple(args.amenity),
+        historical=True if args.historical else None,
+        guest_favorite=True if args.guest_favorite else None,
+        limit=args.limit
+    )
+    if query == ListingQuery():
+        query = None
+
+    profiles = ProfileManager(cache_size_mb=args.cache_size_mb) if args.persistent_profile else None
+    scraper = AirbnbScraper(profiles=profiles, listing_budget=args.listing_budget, tabs=args.tabs,
+                            network_capture=args.network_capture)
     
     try:
-        # Get the Airbnb search URL from user
-        url = input("Enter the complete Airbnb search URL: ")
-        num_pages = int(input("Enter number of pages to scrape (default 5): ") or 5)
+        if args.url:
+            url, num_pages, mode = args.url, args.pages or 5, args.mode or "full"
+        else:
+            # No URL on the command line, so ask for anything else that's missing too
+            url = input("Enter the complete Airbnb search URL: ")
+            num_pages = args.pages or int(input("Enter number of pages to scrape (default 5): ") or 5)
+            mode = args.mode or input("Enter scrape mode, full or grid (default full): ") or "full"
         
         print(f"\nScraping Airbnb listings...")
-        scraper.scrape_url(url, num_pages=num_pages)
+        scraper.scrape_url(url, num_pages=num_pages, mode=mode, query=query)
         
         # Save results
         scraper.save_results()